@@ -24,6 +24,12 @@ class DatasetConfig:
     file_pattern: str = "*.nii.gz"  # File pattern for image files
     base_model_name: str = "TOT"  # Base model for STAPLE
     
+    @property
+    def tot_subdir(self) -> Optional[str]:
+        """Subdirectory holding the original images (e.g. 'IXI_TOT', 'COW_TOT'), None if not supported"""
+        subdir = f"{self.name}_{self.base_model_name}"
+        return subdir if subdir in self.supported_models else None
+    
     def get_image_path(self, case_id: str) -> Path:
         """Get path to original image for a case"""
         return self.base_path / self.image_dir / f"{case_id}.{self.image_suffix}"
@@ -1,15 +1,35 @@
-import qt, ctk, slicer
-import logging, traceback
-import os, json, hashlib, datetime
+import qt, ctk, slicer, vtk
+import logging, traceback, threading
+import os, re, stat, json, gzip, shutil, hashlib, datetime, tempfile, functools, itertools
+import numpy as np
 
 from pathlib import Path
 from typing import Dict, List, Optional
+from collections import deque
+from collections.abc import Mapping
 
 from slicer.ScriptedLoadableModule import *
 from slicer.util import VTKObservationMixin
 from opacity_slicer import OpacitySliderWidget
 from loading_dialog import ProcessingDialog
 
+logger = logging.getLogger('VesselVerse')
+
+# Source of per-save file hashes: a random salt drawn once per session (pids and
+# counters repeat across sessions) followed by a per-save counter
+_sessionSalt = os.urandom(4).hex()
+_saveCounter = itertools.count()
+
+try:
+    import nibabel as nib
+except ImportError:  # Not bundled with Slicer: fall back to slicer.util loaders
+    nib = None
+
+try:
+    import orjson
+except ImportError:  # Optional faster parser: fall back to the json module
+    orjson = None
+
 
 class HistoryTreeWidget(qt.QTreeWidget):
     def __init__(self, parent=None):
@@ -108,7 +128,7 @@ class HistoryWidget(qt.QWidget):
         layout.addWidget(self.historyTree)
         
         # Add opacity control
-        self.opacityControl = OpacitySliderWidget()
+        self.opacityControl = OpacitySliderWidget(segmentationNodes=self.logic.getSegmentationNodes)
         layout.addWidget(self.opacityControl)
         
         # Comparison settingsa
@@ -245,7 +265,7 @@ class HistoryWidget(qt.QWidget):
         parent = slicer.modules.vesselverse.widgetRepresentation().self()
         parent.onLoadSegmentation()
         
-        current_nodes = slicer.util.getNodesByClass("vtkMRMLSegmentationNode")
+        current_nodes = self.logic.getSegmentationNodes()
         if not current_nodes:
             loadingDialog.close()
             slicer.util.errorDisplay("Failed to load current segmentation")
@@ -260,31 +280,22 @@ class HistoryWidget(qt.QWidget):
         
         # Load comparison segmentation
         loadingDialog.update_status("Loading comparison segmentation...")
-        success = slicer.util.loadSegmentation(version_path)
-        if not success:
+        comparison_node = self.logic.loadSegmentationNode(Path(version_path))
+        if not comparison_node:
             slicer.util.errorDisplay(f"Failed to load comparison: {version_path}")
             return
-                
-        # Get comparison node (the last loaded segmentation)
-        comparison_node = slicer.util.getNodesByClass("vtkMRMLSegmentationNode")[-1]
-
-        # Create surface representations and compare
-        current_node.CreateClosedSurfaceRepresentation()
-        comparison_node.CreateClosedSurfaceRepresentation()
 
+        # Compare and remove both inputs
         loadingDialog.update_status("Computing intersection...")
-        result_node = compareSegmentations(
+        result_node = self.logic.compareWithCurrent(
             current_node, 
             comparison_node,
             use_padding=self.usePaddingCheckbox.isChecked()
         )
         
-        # Update opacity control and cleanup
+        # Update opacity control
         if hasattr(self, 'opacityControl'):
             self.opacityControl.updateForNode(result_node)
-            
-        slicer.mrmlScene.RemoveNode(current_node)
-        slicer.mrmlScene.RemoveNode(comparison_node)
         
         loadingDialog.close()
 
@@ -294,7 +305,7 @@ class HistoryWidget(qt.QWidget):
         layoutManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpView)
         
         # Hide all volumes in 3D view
-        volumeNodes = slicer.util.getNodesByClass("vtkMRMLScalarVolumeNode")
+        volumeNodes = self.logic.getVolumeNodes()
         for volumeNode in volumeNodes:
             displayNode = volumeNode.GetDisplayNode()
             if displayNode:
@@ -370,7 +381,7 @@ class HistoryWidget(qt.QWidget):
 
     def onKeepCurrent(self):
         # Get current segmentation node
-        current_nodes = slicer.util.getNodesByClass("vtkMRMLSegmentationNode")
+        current_nodes = self.logic.getSegmentationNodes()
         if not current_nodes:
             slicer.util.errorDisplay("No current segmentation loaded")
             return
@@ -468,10 +479,19 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         self.logic = None
         self._parameterNode = None
         self._updatingGUIFromParameterNode = False
+        # Controls injected into the Segment Editor panel by onOpenSegmentEditor
+        self._injectedControlPanel = None
+        self._injectedOpacityControl = None
+        # dataset name -> (dataset_config, resolved base path, image directory)
+        self._datasetCache: Dict[str, tuple] = {}
+        # expert directory (resolved path string) -> (directory mtime, [(expertID, timestamp, path), ...])
+        self._expertListCache: Dict[tuple, tuple] = {}
     
     def cleanup(self):
         """Called when the module is closed"""
         self.removeObservers()
+        if self.logic:
+            self.logic.removeObservers()
         
     def setup(self):
         ScriptedLoadableModuleWidget.setup(self)
@@ -514,7 +534,6 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         datasetLayout.setSpacing(8)
 
         self.datasetSelectorDropDown = qt.QComboBox()
-        from model_config.model_config import dataset_registry
         dataset_names = list(dataset_registry.datasets.keys())
         self.datasetSelectorDropDown.addItems(dataset_names)  # Load dataset names dynamically
 
@@ -711,7 +730,6 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         
     def forceDatasetSelection(self, dataset_names=None):
         if not dataset_names:
-            from model_config.model_config import dataset_registry
             dataset_names = list(dataset_registry.datasets.keys())
         
         print(f"Available datasets: {dataset_names}")
@@ -799,29 +817,22 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         """Set the selected dataset and update paths/configurations dynamically."""
 
         selectedDataset = self.datasetSelector.currentText
-        from model_config.model_config import dataset_registry
-        dataset_config = dataset_registry.get_dataset(selectedDataset)
+        try:
+            resolved = self._resolveDataset(selectedDataset)
+        except ValueError as e:
+            slicer.util.errorDisplay(f"Error: {str(e)}")
+            return
 
-        if dataset_config:
-            base_path = dataset_config.base_path.resolve()  # Extract base_path dynamically
+        if resolved:
+            dataset_config, base_path, base_path_selector = resolved
             print(f"Selected Dataset: {selectedDataset}")
             print(f"Base Path: {base_path}")
             
-            if 'IXI' in str(base_path):
-                base_path_selector = Path(base_path) / 'IXI_TOT'
-            elif 'COW' in str(base_path):
-                base_path_selector = Path(base_path) / 'COW_TOT'
-            else:
-                assert(), f"Unknown dataset: {base_path}"
-            
             self.logic.setDataset(base_path)  # Pass base_path instead of just the name
             # Update UI components
             self.imagePathSelector.setCurrentPath(str(base_path_selector))
             supported_models = [model for model in dataset_config.supported_models if '_TOT' not in model]
-            self.modelSelector.clear()
-            self.modelSelector.addItems(supported_models)
-            self.modelSelector2.clear()
-            self.modelSelector2.addItems(supported_models)
+            self._setModelSelectorItems(supported_models)
             self.datasetSelectorDropDown.setCurrentText(selectedDataset)
             #slicer.util.infoDisplay(f"Dataset '{selectedDataset}' loaded successfully.\nBase Path: {base_path}", windowTitle="Dataset Selected")
 
@@ -830,6 +841,30 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             slicer.util.errorDisplay(f"Error: Dataset '{selectedDataset}' not found in registry!")
 
 
+    def _setModelSelectorItems(self, supported_models):
+        """Refill both model selectors, notifying each selection handler once instead of per item"""
+        for selector, onChanged in [(self.modelSelector, self.onModelSelectionChanged1),
+                                    (self.modelSelector2, self.onModelSelectionChanged2)]:
+            wasBlocked = selector.blockSignals(True)
+            selector.clear()
+            selector.addItems(supported_models)
+            selector.blockSignals(wasBlocked)
+            onChanged(selector.currentText)
+
+    def _resolveDataset(self, selectedDataset):
+        """Return (dataset_config, base_path, base_path_selector) for a dataset name, or None if unknown"""
+        if selectedDataset not in self._datasetCache:
+            dataset_config = dataset_registry.get_dataset(selectedDataset)
+            if not dataset_config:
+                return None
+            
+            base_path = dataset_config.base_path.resolve()
+            if not dataset_config.tot_subdir:
+                raise ValueError(f"Unknown dataset: {base_path}")
+            base_path_selector = base_path / dataset_config.tot_subdir
+            self._datasetCache[selectedDataset] = (dataset_config, base_path, base_path_selector)
+        return self._datasetCache[selectedDataset]
+
     def closeSlicer(self, dialog):
         """Close 3D Slicer application."""
         slicer.util.exit()
@@ -839,40 +874,34 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         selectedDataset = self.datasetSelectorDropDown.currentText
 
         # Retrieve dataset configuration
-        from model_config.model_config import dataset_registry
-        dataset_config = dataset_registry.get_dataset(selectedDataset)
-        if not dataset_config:
+        try:
+            resolved = self._resolveDataset(selectedDataset)
+        except ValueError:
+            slicer.util.errorDisplay(f"Error: Unknown dataset '{selectedDataset}'")
+            return
+        if not resolved:
             slicer.util.errorDisplay(f"Error: Dataset '{selectedDataset}' not found!")
-            slice.util.infoDisplay(f"Available datasets: {list(dataset_registry.datasets.keys())}")
+            slicer.util.infoDisplay(f"Available datasets: {list(dataset_registry.datasets.keys())}")
             return
 
         # Update dataset in logic
-        base_path = dataset_config.base_path.resolve()
+        dataset_config, base_path, base_path_selector = resolved
         print(f"Selected Dataset: {selectedDataset}")
         print(f"Base Path: {base_path}")
         print("\n\n\n\n\n")
         self.logic.setDataset(base_path)
 
         # Update image selector path
-        if "IXI" in str(base_path):
-            self.imagePathSelector.setCurrentPath(str(base_path / "IXI_TOT"))
-        elif "COW" in str(base_path):
-            self.imagePathSelector.setCurrentPath(str(base_path / "COW_TOT"))
-        else:
-            slicer.util.errorDisplay(f"Error: Unknown dataset '{selectedDataset}'")
-            return
+        self.imagePathSelector.setCurrentPath(str(base_path_selector))
         # Update segmentation models
         supported_models = [model for model in dataset_config.supported_models if '_TOT' not in model]
-        self.modelSelector.clear()
-        self.modelSelector.addItems(supported_models)
-        self.modelSelector2.clear()
-        self.modelSelector2.addItems(supported_models)
+        self._setModelSelectorItems(supported_models)
 
         # Clear history and refresh UI
         self.historyWidget.erase_history()
         
         # Cancel all the loaded images/segmentations
-        self.logic.clearScene()
+        self.logic.clearImagesAndSegmentations()
         self.modelSelector.setCurrentIndex(0)
         
         # Open segmentation editor button should be disabled
@@ -883,12 +912,12 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     def onLoadImage(self):
         """Load the selected input image"""
         imagePath = Path(self.imagePathSelector.currentPath)
-        if not imagePath.exists() or not imagePath.is_file() or not imagePath.suffix == ".gz":
+        if not _validNiiGz(imagePath):
             slicer.util.messageBox("Please select a valid input image")
             return
 
         # Clear everything from the scene
-        self.logic.clearScene()
+        self.logic.clearImagesAndSegmentations()
         self.historyWidget.erase_history()
         self.modelSelector.setCurrentIndex(0)
             
@@ -910,10 +939,9 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         # Setup dialog if comparison mode
         loadingDialog = None
         if for_comparison:
-            if not slicer.util.getNodesByClass("vtkMRMLSegmentationNode"):
-                slicer.util.errorDisplay("No current segmentation loaded: loading the first segmentation")
-                
-            self.loadSegmentationW(for_comparison=False)
+            # Only (re)load the first segmentation if the scene does not already hold it
+            if not self._isSelectedSegmentationLoaded():
+                self.loadSegmentationW(for_comparison=False)
             loadingDialog = ProcessingDialog(slicer.util.mainWindow())
             loadingDialog.show()
             loadingDialog.update_status("Loading second segmentation for comparison...")
@@ -925,12 +953,12 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             
             # Validate image path
             imagePath = Path(self.imagePathSelector.currentPath)
-            if not imagePath.exists() or not imagePath.is_file() or not imagePath.suffix == ".gz":
+            if not _validNiiGz(imagePath):
                 slicer.util.messageBox("Please select an input image first")
                 return
             
             # Load image if needed
-            elif not slicer.util.getNodesByClass('vtkMRMLScalarVolumeNode'):
+            elif not self.logic.getVolumeNodes():
                 slicer.util.messageBox("Proceeding to load the segmentation together with the corresponding image...")
                 self.onLoadImage()
 
@@ -958,31 +986,21 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
                 layoutManager = slicer.app.layoutManager()
                 layoutManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpView)
                 
-                current_node = slicer.util.getNodesByClass("vtkMRMLSegmentationNode")[0]
+                segmentationNodes = self.logic.getSegmentationNodes()
+                current_node = segmentationNodes[0]
                 
-                if not slicer.util.loadSegmentation(str(segPath)):
+                comparison_node = self.logic.loadSegmentationNode(segPath)
+                if not comparison_node:
                     slicer.util.errorDisplay(f"Failed to load comparison: {segPath}")
                     return
-                    
-                comparison_node = slicer.util.getNodesByClass("vtkMRMLSegmentationNode")[-1]
                 
-                if loadingDialog:
-                    loadingDialog.update_status("Creating surface representations...")
-                
-                # Create surface representations
-                for node in [current_node, comparison_node]:
-                    node.CreateClosedSurfaceRepresentation()
-                
-                # Compare and cleanup
+                # Compare and remove both inputs
                 if loadingDialog:
                     loadingDialog.update_status("Computing intersection...")
-                result_node = compareSegmentations(
+                result_node = self.logic.compareWithCurrent(
                     current_node,
                     comparison_node,
                     use_padding=self.historyWidget.usePaddingCheckbox.isChecked())
-                
-                for node in [current_node, comparison_node]:
-                    slicer.mrmlScene.RemoveNode(node)
                     
                 # Update opacity control
                 if hasattr(self.historyWidget, 'opacityControl'):
@@ -999,7 +1017,7 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
                     print(f"Segmentation loaded: {segPath}")
                     self.historyWidget.update_history(str(segPath))
                     
-                    segNode = slicer.util.getNodesByClass('vtkMRMLSegmentationNode')
+                    segNode = self.logic.getSegmentationNodes()
                     if segNode:
                         segNode[0].Modified()
                         # Rename segment to match opacity slider naming
@@ -1021,6 +1039,23 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             if loadingDialog:
                 loadingDialog.close()
 
+    def _expectedFirstSegPath(self):
+        """Segmentation path selected by the first model selector (None if it cannot be resolved)"""
+        modelType = self.modelSelector.currentText
+        if modelType in ["ExpertAnnotations", "ExpertVAL"]:
+            expertData = self.expertVersionSelector.itemData(self.expertVersionSelector.currentIndex)
+            return Path(expertData) if expertData else None
+        try:
+            return self.logic.dataset.get_model_path(Path(self.imagePathSelector.currentPath), modelType)
+        except (ValueError, FileNotFoundError):
+            return None
+
+    def _isSelectedSegmentationLoaded(self):
+        """True if the scene holds only the segmentation selected by the first model selector"""
+        # Checked by node identity: a comparison result left alone in the scene
+        # is not the loaded segmentation, so it forces a reload
+        return self.logic.isSegmentationLoaded(self._expectedFirstSegPath())
+
     # Replace original methods with calls to the new unified function
     def onLoadSegmentation(self):
         """Load corresponding segmentation based on selected model"""
@@ -1042,14 +1077,14 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
                 return
 
             # Get current segmentation
-            segmentationNode = slicer.util.getNodesByClass("vtkMRMLSegmentationNode")
+            segmentationNode = self.logic.getSegmentationNodes()
             if not segmentationNode:
                 slicer.util.messageBox("No segmentation found to save")
                 return
 
             # Get original image path
             imagePath = Path(self.imagePathSelector.currentPath)
-            if not imagePath.exists():
+            if not _validNiiGz(imagePath):
                 slicer.util.messageBox("No input image selected")
                 return
 
@@ -1063,25 +1098,34 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             if response == qt.QMessageBox.No:
                 return
             
-            # Save modifications
-            self.logic.saveModifiedSegmentation(
+            # Save modifications (written in the background)
+            modelType = self.modelSelector.currentText
+            saveTask = self.logic.saveModifiedSegmentation(
                 segmentationNode[0],
                 imagePath,
                 self.expertIDInput.text,
                 self.notesText.toPlainText(),
-                self.modelSelector.currentText,
+                modelType,
                 original_segmentation_path=self.logic.current_segmentation_path
             )
 
-            # Update expert versions and history
-            self.updateExpertVersions(self.expertVersionSelector, self.modelSelector.currentText)
-            
-            # Return to VesselVerse
+            def onSaved(outputPath):
+                # Update expert versions first, so the reload picks up the new save
+                self._expertListCache.pop(str(outputPath.parent), None)
+                self.updateExpertVersions(self.expertVersionSelector, modelType)
+                self._switchToVesselVerse()
+                slicer.util.messageBox("Segmentation saved successfully!")
+
+            def onSaveFailed(error):
+                # Reported after the user is back in VesselVerse: name the file that failed
+                logger.error("Error saving segmentation %s: %s", saveTask.outputPath, error)
+                self._switchToVesselVerse(reload=False)
+                slicer.util.errorDisplay(f"Error saving segmentation {saveTask.outputPath}: {str(error)}")
+
+            # Detach the editor controls now; return to VesselVerse once the save is done
             self._disconnectSegmentEditorSignals()
             self._removeReturnButton()
-            qt.QTimer.singleShot(100, self._switchToVesselVerse)
-
-            slicer.util.messageBox("Segmentation saved successfully!")
+            saveTask.then(onSaved, onSaveFailed)
 
         except Exception as e:
             print(f"Error saving and returning: {str(e)}")
@@ -1110,17 +1154,13 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         selector.clear()
         
         imagePath = Path(self.imagePathSelector.currentPath)
-        if not imagePath.exists():
+        if not _validNiiGz(imagePath):
             return     
         # Get image ID from filename (e.g., "IXI022-Guys-0701-MRA.nii.gz" -> "IXI022")
         imageID = imagePath.stem.split('-')[0]
         
         # Get all expert annotations for this image
-        expertFiles = list(self.logic.dataset.paths[f"{modelType}"].glob(f"{imageID}/{imageID}_expert_*.nii.gz"))
-        expertFiles = sorted(
-                        expertFiles,
-                        key=lambda x: datetime.datetime.strptime(x.stem.replace('.nii', '')[-15:], '%Y%m%d_%H%M%S'),
-                        reverse=True)
+        expertFiles = self._listExpertFiles(modelType, imageID)
         
         if not expertFiles:
             selector.addItem("No expert annotations available", None)
@@ -1128,33 +1168,62 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             return
             
         selector.setEnabled(True)
-        for filepath in expertFiles:
-            # Extract expert ID and timestamp from filename
-            # Format: IXI022_expert_E01_20250120_215410.nii.gz
-            parts = Path(filepath).stem.replace('.nii', '').split('_')
-            expertID = parts[-3]
-            timestamp = '_'.join(parts[-2:])
-            assert len(timestamp) == 15, f"Timestamp length is {len(timestamp)} instead of 15 ({timestamp})"
+        for expertID, timestamp, filepath in expertFiles:
             # Store the full path as string in the item data
             selector.addItem(f"{expertID} ({timestamp})", str(filepath))
             
         # Set the first item as selected by default
         if expertFiles:
                 selector.setCurrentIndex(0)
+
+    def _listExpertFiles(self, modelType, imageID):
+        """Return [(expertID, timestamp, path string), ...] newest first, cached until the directory changes"""
+        expertDir = self.logic.dataset.paths[f"{modelType}"] / imageID
+        try:
+            mtime = expertDir.stat().st_mtime
+        except OSError:
+            return []
+        
+        # Keyed on the directory itself: the same model/image pair exists in other datasets
+        cacheKey = str(expertDir)
+        cached = self._expertListCache.get(cacheKey)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        prefix = f"{imageID}_expert_"
+        with os.scandir(expertDir) as it:
+            expertFiles = [e for e in it if e.name.startswith(prefix) and e.name.endswith('.nii.gz')]
+        # The YYYYMMDD_HHMMSS timestamp is fixed-width, so sorting on it as a
+        # string gives chronological order (the expert ID in front does not)
+        expertFiles.sort(key=lambda e: e.name[-22:-7], reverse=True)
+        entries = []
+        for entry in expertFiles:
+            # Extract expert ID and timestamp from filename
+            # Format: IXI022_expert_E01_20250120_215410.nii.gz
+            parts = entry.name[:-7].rsplit('_', 3)
+            expertID = parts[-3]
+            timestamp = f"{parts[-2]}_{parts[-1]}"
+            assert len(timestamp) == 15, f"Timestamp length is {len(timestamp)} instead of 15 ({timestamp})"
+            entries.append((expertID, timestamp, entry.path))
+        
+        self._expertListCache[cacheKey] = (mtime, entries)
+        return entries
     
     def onOpenSegmentEditor(self):
         """Open the Segment Editor module configured for the current segmentation"""
-        self.onLoadSegmentation()
+        # Reload only if the selected segmentation is not the one already in the scene
+        if not self._isSelectedSegmentationLoaded():
+            self.onLoadSegmentation()
         self.historyWidget.onKeepCurrent()
         
         # Get current segmentation
-        segmentationNodes = slicer.util.getNodesByClass("vtkMRMLSegmentationNode")
+        segmentationNodes = self.logic.getSegmentationNodes()
         if not segmentationNodes:
             slicer.util.messageBox("No segmentation loaded")
             return
 
         # Get current volume node
-        volumeNode = slicer.util.getNodesByClass("vtkMRMLScalarVolumeNode")
+        volumeNode = self.logic.getVolumeNodes()
         if not volumeNode:
             slicer.util.messageBox("No volume loaded")
             return
@@ -1289,11 +1358,15 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
             
             # Create an opacity control widget
-            self.opacityControl = OpacitySliderWidget()
+            self.opacityControl = OpacitySliderWidget(segmentationNodes=self.logic.getSegmentationNodes)
             self.opacityControl.updateForNode(segmentationNodes[0])
             
             # Add the opacity control
             layout.insertWidget(1, self.opacityControl)
+            
+            # Keep handles so the controls can be removed without scanning the panel
+            self._injectedControlPanel = controlPanel
+            self._injectedOpacityControl = self.opacityControl
         except Exception as e:
             print(f"Error setting up Segment Editor: {str(e)}")
             slicer.util.errorDisplay("Error setting up Segment Editor")
@@ -1310,7 +1383,7 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         if response == qt.QMessageBox.Yes:
             self._disconnectSegmentEditorSignals()
             self._removeReturnButton()
-            qt.QTimer.singleShot(100, self._switchToVesselVerse)
+            qt.QTimer.singleShot(0, self._switchToVesselVerse)
     
     def returnToVesselVerse(self):
         """Return to VesselVerse module safely"""
@@ -1321,15 +1394,16 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             # Remove the return button before switching modules
             self._removeReturnButton()
             
-            # Switch modules using a single timer call
-            qt.QTimer.singleShot(100, self._switchToVesselVerse)
+            # Switch modules on the next event-loop iteration: the controls are already
+            # detached (setParent(None)) and their deleteLater runs on that same spin
+            qt.QTimer.singleShot(0, self._switchToVesselVerse)
             
         except Exception as e:
             print(f"Error returning to VesselVerse: {str(e)}")
             slicer.util.errorDisplay("Error returning to VesselVerse")
             
-    def _switchToVesselVerse(self):
-        """Switch to VesselVerse module"""
+    def _switchToVesselVerse(self, reload=True):
+        """Switch to VesselVerse module (and reload the selected segmentation unless reload is False)"""
         try:
             # Switch module
             slicer.util.selectModule("VesselVerse")
@@ -1339,6 +1413,9 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             if layoutManager:
                 layoutManager.setLayout(layoutManager.layout)
                 
+            if not reload:
+                return
+                
             # Update the history widget
             if hasattr(self, 'historyWidget'):
                 self.historyWidget.update_history(str(self.logic.current_segmentation_path))
@@ -1362,47 +1439,341 @@ class VesselVerseWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     def _removeReturnButton(self):
         """Remove controls from Segment Editor"""
         try:
-            segmentEditorParent = slicer.modules.segmenteditor.widgetRepresentation()
-            if segmentEditorParent:
-                for child in segmentEditorParent.children():
-                    # Remove control panel with expert info and save button
-                    if isinstance(child, qt.QFrame):
-                        child.setParent(None)
-                        child.deleteLater()
-                    # Remove opacity slider
-                    if isinstance(child, OpacitySliderWidget):
-                        child.setParent(None)
-                        child.deleteLater()
-                        
+            for control in [self._injectedControlPanel, self._injectedOpacityControl]:
+                if control is not None:
+                    control.setParent(None)
+                    control.deleteLater()
+            self._injectedControlPanel = None
+            self._injectedOpacityControl = None
         except Exception as e:
             print(f"Error removing controls: {str(e)}")
 
+class _GuiThreadDispatcher(qt.QObject):
+    """Runs callables handed over from worker threads on the GUI thread.
 
+    PythonQt cannot declare new signals on Python classes, so this does what a
+    queued connection does: the worker queues the call and posts an event, and
+    Qt delivers the event on the thread that owns this object.
+    """
+    def __init__(self):
+        qt.QObject.__init__(self)
+        self._calls = deque()  # append/popleft are thread-safe
+
+    def post(self, function):
+        self._calls.append(function)
+        qt.QCoreApplication.postEvent(self, qt.QEvent(qt.QEvent.User))
 
-    def _safeModuleSwitch(self):
-        """Safely switch back to VesselVerse module"""
+    def customEvent(self, event):
+        while self._calls:
+            self._calls.popleft()()
+
+class BackgroundTask(qt.QRunnable):
+    """Run a function on the global QThreadPool while the GUI thread keeps processing events.
+
+    Only plain Python/numpy work belongs in the function: MRML and VTK objects must
+    be created and modified on the GUI thread once wait() has returned (or in the
+    then() callbacks, which also run on the GUI thread).
+    """
+    # Tasks with pending then() callbacks, kept alive until they have fired
+    _pending = set()
+    # Created on the GUI thread by the first then() call
+    _dispatcher = None
+
+    def __init__(self, function, *args):
+        qt.QRunnable.__init__(self)
+        self.setAutoDelete(False)
+        self._function = function
+        self._args = args
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+        self._onFinished = None
+        self.result = None
+        self.error = None
+
+    def run(self):
         try:
-            # Switch back to VesselVerse module
-            slicer.util.selectModule("VesselVerse")
-            
-            # Get the Segment Editor widget
-            segmentEditorParent = slicer.modules.segmenteditor.widgetRepresentation()
-            if segmentEditorParent:
-                # Find and remove the return button
-                for child in segmentEditorParent.children():
-                    if isinstance(child, qt.QPushButton) and child.text == "Return to VesselVerse":
-                        child.setParent(None)
-                        child.deleteLater()
-                        break
+            self.result = self._function(*self._args)
         except Exception as e:
-            print(f"Error in safe module switch: {str(e)}")
-            slicer.util.errorDisplay("Error switching modules")
-    
+            self.error = e
+        finally:
+            with self._lock:
+                self._finished.set()
+                onFinished = self._onFinished
+            if onFinished:
+                BackgroundTask._dispatcher.post(onFinished)
+
+    def start(self):
+        qt.QThreadPool.globalInstance().start(self)
+        return self
+
+    def wait(self):
+        """Wait for the worker while repainting dialogs/views, then return its result.
+
+        User input stays queued until the worker is done, so a click cannot start
+        another load or clear the scene while the caller waits.
+        """
+        while not self._finished.wait(0.02):
+            slicer.app.processEvents(qt.QEventLoop.ExcludeUserInputEvents)
+        if self.error:
+            raise self.error
+        return self.result
+
+    def then(self, callback, errback=None):
+        """Call callback(result), or errback(error) if the function raised, once the worker is done.
+
+        Must be called on the GUI thread; the callbacks run there too.
+        """
+        def deliver():
+            BackgroundTask._pending.discard(self)
+            if self.error:
+                if errback:
+                    errback(self.error)
+                else:
+                    print(f"Background task failed: {str(self.error)}")
+            else:
+                callback(self.result)
+        if BackgroundTask._dispatcher is None:
+            BackgroundTask._dispatcher = _GuiThreadDispatcher()
+        BackgroundTask._pending.add(self)
+        with self._lock:
+            finished = self._finished.is_set()
+            if not finished:
+                self._onFinished = deliver
+        if finished:
+            BackgroundTask._dispatcher.post(deliver)
+        return self
+
+class LazyMetadataDict(Mapping):
+    """Read-only mapping of metadata name -> parsed JSON, loaded on first access.
+
+    Only the file path of each entry is stored up front; the JSON is parsed (by
+    loader, if given) the first time the entry is looked up and kept for
+    subsequent lookups.
+    """
+    def __init__(self, paths: Dict[str, Path], loader=None):
+        self._paths = dict(paths)
+        self._loader = loader or _readMetadataJson
+        self._loaded = {}
+
+    def __getitem__(self, key):
+        if key not in self._loaded:
+            self._loaded[key] = self._loader(self._paths[key])
+        return self._loaded[key]
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+class MetaEntry:
+    """One metadata entry with the common fields stored in slots.
+
+    Datasets hold thousands of entries with the same keys, so slots avoid a
+    per-entry dict. Fields missing from the JSON stay unset (get() returns the
+    default); any other keys (e.g. affine/header of model metadata) go to extra.
+    """
+    FIELDS = ('unique_key', 'path', 'relative_path', 'filename', 'image_id', 'owner', 'model',
+              'original_segmentation_path', 'creation_date', 'notes', 'size_bytes', 'file_hash')
+    __slots__ = FIELDS + ('extra',)
 
-            
-class VesselVerseLogic(ScriptedLoadableModuleLogic):
+    def __init__(self):
+        self.extra = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MetaEntry':
+        entry = cls()
+        extra = {}
+        for key, value in data.items():
+            if key in _META_FIELDS:
+                setattr(entry, key, value)
+            else:
+                extra[key] = value
+        if extra:
+            entry.extra = extra
+        return entry
+
+    def get(self, key: str, default=None):
+        if key in _META_FIELDS:
+            return getattr(self, key, default)
+        return self.extra.get(key, default) if self.extra else default
+
+    def to_dict(self) -> Dict:
+        data = {field: getattr(self, field) for field in self.FIELDS if hasattr(self, field)}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+_META_FIELDS = frozenset(MetaEntry.FIELDS)
+
+class IndexedMetadata(dict):
+    """Metadata dict (unique key -> MetaEntry) with reverse indexes on the path fields.
+
+    The indexes are built once when the file is parsed, so finding the entry for
+    a segmentation is a few dict lookups instead of a scan over every entry.
+    """
+    INDEXED_FIELDS = ('relative_path', 'path', 'filename')
+
+    def __init__(self, entries: Dict[str, Dict]):
+        dict.__init__(self, ((key, MetaEntry.from_dict(entry)) for key, entry in entries.items()))
+        self._order = {key: i for i, key in enumerate(self)}
+        self._index = {field: {} for field in self.INDEXED_FIELDS}
+        for key, entry in self.items():
+            for field, index in self._index.items():
+                value = getattr(entry, field, None)
+                if value is not None:
+                    index.setdefault(value, key)
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Plain JSON-serializable form"""
+        return {key: entry.to_dict() for key, entry in self.items()}
+
+    def find(self, **values) -> Optional[str]:
+        """Key of the first entry (in file order) matching any of the given field values"""
+        keys = [self._index[field].get(value) for field, value in values.items()]
+        keys = [key for key in keys if key is not None]
+        return min(keys, key=self._order.__getitem__) if keys else None
+
+class VesselVerseLogic(ScriptedLoadableModuleLogic, VTKObservationMixin):
     def __init__(self):
         ScriptedLoadableModuleLogic.__init__(self)
+        VTKObservationMixin.__init__(self)
+        
+        # Parsed metadata JSON per file, reused while (mtime_ns, size) of the file and its log are unchanged
+        self._metaCache: Dict[Path, tuple] = {}
+        # One lock per metadata file: saves append and compact from worker threads
+        self._metaLocks: Dict[Path, threading.Lock] = {}
+        self._metaLocksGuard = threading.Lock()
+        
+        # Decompressed copies of loaded .nii.gz files, evicted least-recently-used first
+        self._niiCacheDir = Path(slicer.app.temporaryPath) / 'vesselverse_niicache'
+        self.niiCacheMaxSizeMB = 4096
+        
+        # Segmentation/volume nodes in scene order, kept in sync by scene observers
+        # so lookups do not have to walk the whole MRML scene
+        self._segNodes = []
+        self._volumeNodes = []
+        # Hidden labelmap node reused for labelmap import/export (see _scratchLabelmapNode)
+        self._tmpLabelmapNode = None
+        
+        # Segmentations waiting for a 3D view to be shown before building closed surfaces
+        self._pendingSurfaceNodes = []
+        self._layoutConnected = False
+        
+        # File and node of the segmentation last loaded by loadSegmentation
+        self.current_segmentation_path = None
+        self.current_segmentation_node_id = None
+        self._resetNodeHandles()
+        self.addObserver(slicer.mrmlScene, slicer.vtkMRMLScene.NodeAddedEvent, self._onNodeAdded)
+        self.addObserver(slicer.mrmlScene, slicer.vtkMRMLScene.NodeRemovedEvent, self._onNodeRemoved)
+        self.addObserver(slicer.mrmlScene, slicer.vtkMRMLScene.EndCloseEvent, self._onSceneClosed)
+
+    def _resetNodeHandles(self):
+        """Rebuild node handles from the scene"""
+        self._segNodes = list(slicer.util.getNodesByClass("vtkMRMLSegmentationNode"))
+        self._volumeNodes = [node for node in slicer.util.getNodesByClass("vtkMRMLScalarVolumeNode")
+                             if not node.GetHideFromEditors()]
+
+    @vtk.calldata_type(vtk.VTK_OBJECT)
+    def _onNodeAdded(self, caller, event, node):
+        if node.IsA("vtkMRMLSegmentationNode"):
+            self._segNodes.append(node)
+        elif node.IsA("vtkMRMLScalarVolumeNode") and not node.GetHideFromEditors():
+            self._volumeNodes.append(node)
+
+    @vtk.calldata_type(vtk.VTK_OBJECT)
+    def _onNodeRemoved(self, caller, event, node):
+        handles = self._segNodes if node.IsA("vtkMRMLSegmentationNode") else self._volumeNodes
+        if node in handles:
+            handles.remove(node)
+        # The loaded segmentation is gone (e.g. replaced by a comparison result)
+        if self.current_segmentation_node_id is not None and node.GetID() == self.current_segmentation_node_id:
+            self.forgetCurrentSegmentation()
+
+    def forgetCurrentSegmentation(self):
+        """Mark that no loaded segmentation is in the scene anymore"""
+        self.current_segmentation_path = None
+        self.current_segmentation_node_id = None
+
+    def compareWithCurrent(self, current_node, comparison_node, use_padding=False):
+        """Compare two segmentations into a new result node and remove both inputs.
+
+        The inputs are only read as binary labelmaps, so no closed surfaces are
+        built for them. Afterwards no loaded segmentation is in the scene: the
+        next edit or comparison reloads it instead of reusing the result node.
+        """
+        result_node = compareSegmentations(current_node, comparison_node, use_padding=use_padding)
+        self.createClosedSurfaceWhenVisible(result_node)
+        for node in (current_node, comparison_node):
+            slicer.mrmlScene.RemoveNode(node)
+        self.forgetCurrentSegmentation()
+        return result_node
+
+    def isSegmentationLoaded(self, segPath) -> bool:
+        """True if the scene holds only the node loadSegmentation created for segPath"""
+        if segPath is None or self.current_segmentation_path is None or len(self._segNodes) != 1:
+            return False
+        return (self._segNodes[0].GetID() == self.current_segmentation_node_id
+                and Path(self.current_segmentation_path) == Path(segPath))
+
+    def _onSceneClosed(self, caller, event):
+        self._resetNodeHandles()
+        self.forgetCurrentSegmentation()
+
+    def _scratchLabelmapNode(self):
+        """Hidden labelmap node reused across saves/loads instead of adding and removing one each time.
+
+        Recreated if the scene was cleared. Callers release its voxels with
+        SetAndObserveImageData(None) when done.
+        """
+        node = self._tmpLabelmapNode
+        if node is None or node.GetScene() is not slicer.mrmlScene:
+            node = slicer.mrmlScene.CreateNodeByClass("vtkMRMLLabelMapVolumeNode")
+            node.UnRegister(None)  # CreateNodeByClass returns an owned reference
+            node.SetName(slicer.mrmlScene.GenerateUniqueName("VesselVerseScratchLabelmap"))
+            node.SetHideFromEditors(True)
+            node.SetSaveWithScene(False)
+            slicer.mrmlScene.AddNode(node)
+            self._tmpLabelmapNode = node
+        return node
+
+    def createClosedSurfaceWhenVisible(self, segmentationNode):
+        """Build the 3D closed surface now if a 3D view is shown, otherwise on the first layout
+        change that shows one. Marching cubes is wasted work while only slice views are visible."""
+        if self._isThreeDViewVisible():
+            segmentationNode.CreateClosedSurfaceRepresentation()
+            return
+        layoutManager = slicer.app.layoutManager()
+        if not layoutManager:
+            segmentationNode.CreateClosedSurfaceRepresentation()
+            return
+        if not self._layoutConnected:
+            layoutManager.layoutChanged.connect(self._onLayoutChanged)
+            self._layoutConnected = True
+        self._pendingSurfaceNodes.append(segmentationNode)
+
+    def _isThreeDViewVisible(self) -> bool:
+        layoutManager = slicer.app.layoutManager()
+        if not layoutManager:
+            return False
+        return any(layoutManager.threeDWidget(i).isVisible() for i in range(layoutManager.threeDViewCount))
+
+    def _onLayoutChanged(self, layout=None):
+        if not self._pendingSurfaceNodes or not self._isThreeDViewVisible():
+            return
+        pending, self._pendingSurfaceNodes = self._pendingSurfaceNodes, []
+        for segmentationNode in pending:
+            # Skip segmentations that were removed in the meantime
+            if segmentationNode.GetScene():
+                segmentationNode.CreateClosedSurfaceRepresentation()
+
+    def getSegmentationNodes(self) -> List:
+        """Segmentation nodes currently in the scene (same order as getNodesByClass)"""
+        return list(self._segNodes)
+
+    def getVolumeNodes(self) -> List:
+        """Scalar volume nodes currently in the scene (same order as getNodesByClass)"""
+        return list(self._volumeNodes)
 
     def setDataset(self, DATA_PATH: Path = None):
         if DATA_PATH:
@@ -1414,7 +1785,7 @@ class VesselVerseLogic(ScriptedLoadableModuleLogic):
         self.model_metadata_path = self.base_path / "model_metadata"
         self.expert_metadata_path = self.base_path / "metadata"
         self.expert_metadata_VAL_path = self.base_path / "metadata_expert_val"
-        self.current_segmentation_path = None
+        self.forgetCurrentSegmentation()
         self.reload_metadata()
         print(f"Dataset updated to: {DATA_PATH}")
         
@@ -1424,67 +1795,169 @@ class VesselVerseLogic(ScriptedLoadableModuleLogic):
         self.expert_metadata = self._load_expert_metadata()
         self.expert_VAL_metadata = self._load_expert_metadata(VAL=True)
     
-    def _load_expert_metadata(self, VAL=False) -> Dict:
-        """Load all expert annotation metadata files."""
-        metadata = {}
+    def _load_expert_metadata(self, VAL=False) -> LazyMetadataDict:
+        """Index all expert annotation metadata files (parsed on first access)."""
         expert_metadata_path = self.expert_metadata_VAL_path if VAL else self.expert_metadata_path
-        for json_file in expert_metadata_path.glob("*_expert_metadata.json"):
-            with open(json_file) as f:
-                print(f"Loading expert metadata: {json_file}")
-                print(f"Metadata: {json_file.stem.split('_')[0]}")
-                metadata[json_file.stem.split('_')[0]] = json.load(f)
-        return metadata
-
-    def _load_model_metadata(self) -> Dict:
-        """Load all model metadata files."""
-        metadata = {}
+        # A model may only have an append log (.jsonl) until its first compaction
+        return LazyMetadataDict({
+            json_file.stem.split('_')[0]: json_file.with_suffix('.json')
+            for json_file in expert_metadata_path.glob("*_expert_metadata.json*")
+            if json_file.suffix in ('.json', '.jsonl')
+        }, loader=self._readMetadataFile)
+
+    def _load_model_metadata(self) -> LazyMetadataDict:
+        """Index all model metadata files (parsed on first access)."""
+        paths = {}
         for model_config in registry.models.values():
             json_file = self.model_metadata_path / f"{model_config.name}_metadata.json"
             if json_file.exists():
-                with open(json_file) as f:
-                    print(f"Loading model metadata for {model_config.name}")
-                    metadata[model_config.name] = json.load(f)
+                paths[model_config.name] = json_file
+        return LazyMetadataDict(paths, loader=self._readMetadataFile)
+
+    def _readMetadataFile(self, json_file: Path) -> Dict:
+        """Parse a metadata JSON file (and its log), reusing the previous parse while neither file changed"""
+        signature = (_statSignature(json_file), _statSignature(json_file.with_suffix('.jsonl')))
+        cached = self._metaCache.get(json_file)
+        if cached and cached[0] == signature:
+            return cached[1]
+        
+        metadata = _readMetadataJson(json_file)
+        self._metaCache[json_file] = (signature, metadata)
         return metadata
     
     def clearScene(self):
         """Clear all nodes from the scene"""
         slicer.mrmlScene.Clear(0)
 
+    def clearImagesAndSegmentations(self):
+        """Remove loaded volumes and segmentations, keeping views, layout, colors and editor nodes"""
+        nodesToRemove = []
+        for node in self.getSegmentationNodes() + self.getVolumeNodes():
+            nodesToRemove.extend(node.GetNthDisplayNode(i) for i in range(node.GetNumberOfDisplayNodes()))
+            if node.GetStorageNode():
+                nodesToRemove.append(node.GetStorageNode())
+            nodesToRemove.append(node)
+        
+        for node in nodesToRemove:
+            if node and slicer.mrmlScene.IsNodePresent(node):
+                slicer.mrmlScene.RemoveNode(node)
+
     def closeAllSegmentations(self):
         """Close all currently loaded segmentations"""
-        segmentationNodes = slicer.util.getNodesByClass("vtkMRMLSegmentationNode")
+        segmentationNodes = self.getSegmentationNodes()
         for node in segmentationNodes:
             slicer.mrmlScene.RemoveNode(node)
 
+    def loadSegmentationNode(self, segPath: Path):
+        """Load a segmentation file into a new segmentation node (None on failure).
+
+        With nibabel available the file is decompressed on a worker thread and only
+        the MRML node creation runs on the GUI thread.
+        """
+        if nib is None:
+            cachedPath = self._getCached(segPath)
+            if not slicer.util.loadSegmentation(str(cachedPath), {"name": segPath.name.split('.')[0]}):
+                return None
+            return self.getSegmentationNodes()[-1]
+        
+        try:
+            array, ijkToRAS = BackgroundTask(self._readCachedLabelmap, segPath).start().wait()
+        except Exception as e:
+            logger.error("Failed to read segmentation %s: %s", segPath, e)
+            return None
+        
+        # MRML/VTK are not thread-safe: build the nodes here on the GUI thread
+        labelmapNode = self._scratchLabelmapNode()
+        slicer.util.updateVolumeFromArray(labelmapNode, array)
+        labelmapNode.SetIJKToRASMatrix(slicer.util.vtkMatrixFromArray(ijkToRAS))
+        segmentationNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLSegmentationNode", segPath.name.split('.')[0])
+        segmentationNode.CreateDefaultDisplayNodes()
+        slicer.modules.segmentations.logic().ImportLabelmapToSegmentationNode(labelmapNode, segmentationNode)
+        labelmapNode.SetAndObserveImageData(None)
+        return segmentationNode
+
+    def _getCached(self, path: Path) -> Path:
+        """Return a decompressed .nii copy of a .nii.gz file from the on-disk cache.
+
+        Entries are keyed by source path and mtime, so a rewritten file gets a new
+        entry. Safe to call from a worker thread.
+        """
+        if not path.name.endswith('.nii.gz'):
+            return path
+        try:
+            key = hashlib.sha1(f"{path.resolve()}{path.stat().st_mtime}".encode()).hexdigest()
+            cachedPath = self._niiCacheDir / f"{key}.nii"
+            if cachedPath.exists():
+                os.utime(cachedPath)  # Mark as recently used
+                return cachedPath
+            
+            self._niiCacheDir.mkdir(parents=True, exist_ok=True)
+            tmpPath = cachedPath.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with gzip.open(path, 'rb') as src, open(tmpPath, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            os.replace(tmpPath, cachedPath)
+            self._evictNiiCache(keep=cachedPath)
+            return cachedPath
+        except OSError as e:
+            logger.warning("Could not cache %s: %s", path, e)
+            return path
+
+    def _readCachedLabelmap(self, segPath: Path):
+        """Worker-thread read of a segmentation through the decompression cache"""
+        return _readLabelmap(self._getCached(segPath))
+
+    def _evictNiiCache(self, keep: Path):
+        """Delete least-recently-used cache entries until the cache fits niiCacheMaxSizeMB"""
+        entries = []
+        for cached in self._niiCacheDir.glob("*.nii"):
+            try:
+                st = cached.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, cached))
+        
+        totalSize = sum(size for _, size, _ in entries)
+        maxSize = self.niiCacheMaxSizeMB * 1024 * 1024
+        for _, size, cached in sorted(entries):
+            if totalSize <= maxSize:
+                break
+            if cached == keep:
+                continue
+            try:
+                cached.unlink()
+                totalSize -= size
+            except OSError:
+                pass
+
     def loadSegmentation(self, segPath: Path) -> bool:
         """Load segmentation into Slicer"""        
-        success = slicer.util.loadSegmentation(str(segPath))
-        if not success:
-            logging.error(f"Failed to load segmentation: {segPath}")
+        segmentationNode = self.loadSegmentationNode(segPath)
+        if not segmentationNode:
+            logger.error("Failed to load segmentation: %s", segPath)
             return False
                 
         # Set up layout
         layoutManager = slicer.app.layoutManager()
         layoutManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpView)
         
-        # Get the segmentation node
-        segmentationNode = slicer.util.getNodesByClass("vtkMRMLSegmentationNode")[0]
-        
-        # Create 3D visualization
-        segmentationNode.CreateClosedSurfaceRepresentation()
+        # Create 3D visualization (deferred while no 3D view is shown)
+        self.createClosedSurfaceWhenVisible(segmentationNode)
         
         # Hide volume in 3D view but keep segmentations visible
-        volumeNodes = slicer.util.getNodesByClass("vtkMRMLScalarVolumeNode")
+        volumeNodes = self.getVolumeNodes()
         if volumeNodes:
-            # Turn off volume rendering
+            # Turn off volume rendering, if any was set up; creating the rendering
+            # nodes only to hide them again would build the whole pipeline for nothing
             volRenLogic = slicer.modules.volumerendering.logic()
-            displayNode = volRenLogic.CreateDefaultVolumeRenderingNodes(volumeNodes[0])
-            displayNode.SetVisibility(False)
+            displayNode = volRenLogic.GetFirstVolumeRenderingDisplayNode(volumeNodes[0])
+            if displayNode:
+                displayNode.SetVisibility(False)
             
             # Also turn off volume slice visibility in 3D
             volumeNodes[0].GetDisplayNode().SetVisibility3D(False)
         
         self.current_segmentation_path = segPath
+        self.current_segmentation_node_id = segmentationNode.GetID()
         self.reload_metadata()
         
         # Convert to binary labelmap representation for 2D views
@@ -1492,8 +1965,12 @@ class VesselVerseLogic(ScriptedLoadableModuleLogic):
         return True
     
     def saveModifiedSegmentation(self, segmentationNode, imagePath: Path, expertID: str, 
-                               notes: str, modelType: str, original_segmentation_path: Path = None):
-        """Save modified segmentation and update metadata"""
+                               notes: str, modelType: str, original_segmentation_path: Path = None) -> BackgroundTask:
+        """Save modified segmentation and update metadata.
+
+        The labelmap is exported on the GUI thread; compressing/writing it and updating
+        the metadata run on a worker. Returns the started task (result and outputPath: the output path).
+        """
         # Generate unique key and file hash
         timestamp_has = datetime.datetime.now()
         timestamp = timestamp_has.strftime("%Y%m%d_%H%M%S")
@@ -1509,41 +1986,61 @@ class VesselVerseLogic(ScriptedLoadableModuleLogic):
         if not segmentationNode.GetSegmentation().GetNumberOfSegments():
             raise ValueError("No segments found in segmentation")
             
-        # Create a new volume node for the binary labelmap
-        labelmapNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLLabelMapVolumeNode")
+        # Export into the reusable labelmap node
+        labelmapNode = self._scratchLabelmapNode()
         slicer.modules.segmentations.logic().ExportAllSegmentsToLabelmapNode(segmentationNode, labelmapNode)
         
-        # Save the labelmap
-        slicer.util.saveNode(labelmapNode, str(outputPath))
-        
-        # Clean up temporary node
-        slicer.mrmlScene.RemoveNode(labelmapNode)
+        if nib is not None:
+            # Snapshot the voxels so the worker never touches the MRML node
+            array = slicer.util.arrayFromVolume(labelmapNode).copy()
+            ijkToRAS = vtk.vtkMatrix4x4()
+            labelmapNode.GetIJKToRASMatrix(ijkToRAS)
+            ijkToRAS = slicer.util.arrayFromVTKMatrix(ijkToRAS)
+        else:
+            # Without nibabel the labelmap has to be written through Slicer (GUI thread)
+            slicer.util.saveNode(labelmapNode, str(outputPath))
+        
+        # Release the voxels but keep the node for the next save
+        labelmapNode.SetAndObserveImageData(None)
+        
+        # Resolve everything that depends on the current dataset here: the
+        # dataset may be switched while the worker is still running
+        metadataPath = self.dataset.base_path / 'metadata' / f"{modelType}_expert_metadata.json"
+        relativePath = outputPath.relative_to(self.base_path)
+        original_seg_path = self._originalSegmentationPath(imageID, modelType, original_segmentation_path)
+
+        def save():
+            if nib is not None:
+                _writeLabelmap(array, ijkToRAS, outputPath)
+            self._updateMetadata(outputPath, metadataPath, relativePath, uniqueKey, imageID, expertID,
+                                 notes, modelType, original_seg_path)
+            return outputPath
+        task = BackgroundTask(save)
+        task.outputPath = outputPath  # Lets a failure be traced to its file (result is only set on success)
+        return task.start()
+
+    def _originalSegmentationPath(self, imageID: str, modelType: str, original_segmentation_path: Path = None):
+        """Segmentation the saved one was derived from (default: the model segmentation of the image)"""
+        if original_segmentation_path is not None:
+            return original_segmentation_path
+        try:
+            assert()
+            imagePath = self.base_path / 'IXI_TOT' / f"{imageID}-Guys-0701-MRA.nii.gz"
+            return self.dataset.get_model_path(imagePath, modelType)
+        except FileNotFoundError:
+            return None
 
-        # Update metadata
-        self._updateMetadata(outputPath, uniqueKey, imageID, expertID, notes, modelType, original_segmentation_path)
+    def _updateMetadata(self, filepath: Path, metadataPath: Path, relativePath: Path, uniqueKey: str, imageID: str, 
+                        expertID: str, notes: str, modelType: str, original_seg_path: Path = None):
+            """Update metadata file with new segmentation information (runs on the save worker).
 
-    def _updateMetadata(self, filepath: Path, uniqueKey: str, imageID: str, 
-                        expertID: str, notes: str, modelType: str, original_segmentation_path: Path = None):
-            """Update metadata file with new segmentation information."""
-            metadataPath = self.dataset.base_path / 'metadata' / f"{modelType}_expert_metadata.json"
-            
-            # Get the original segmentation path
-            if original_segmentation_path is None:
-                try:
-                    print(self.base_path)
-                    assert()
-                    imagePath = self.base_path / 'IXI_TOT' / f"{imageID}-Guys-0701-MRA.nii.gz"
-                    original_seg_path = self.dataset.get_model_path(imagePath, modelType)
-                except FileNotFoundError:
-                    original_seg_path = None
-            else:
-                original_seg_path = original_segmentation_path
-            
+            metadataPath and relativePath are resolved by the caller on the GUI thread.
+            """
             # Create metadata entry
             metadata = {
                 "unique_key": uniqueKey,
                 "path": str(filepath),
-                "relative_path": str(filepath.relative_to(self.base_path)),
+                "relative_path": str(relativePath),
                 "filename": filepath.name,
                 "image_id": imageID,
                 "owner": expertID,
@@ -1555,71 +2052,115 @@ class VesselVerseLogic(ScriptedLoadableModuleLogic):
                 "file_hash": uniqueKey.split('_')[2]
             }
 
-            # Load existing metadata
+            # Append the entry to the metadata log instead of rewriting the whole file
+            logPath = metadataPath.with_suffix('.jsonl')
+            metadataPath.parent.mkdir(parents=True, exist_ok=True)
+            with self._metadataLock(metadataPath):
+                with open(logPath, 'ab') as f:
+                    f.write(_dumpJson(metadata) + b'\n')
+                
+                # Fold the log into the JSON file once it has outgrown it, so compaction cost stays amortized O(1)
+                snapshotSize = metadataPath.stat().st_size if metadataPath.exists() else 0
+                if logPath.stat().st_size > snapshotSize:
+                    self._compactMetadata(metadataPath)
+            
+            # Never serve the pre-write parse, even if mtime granularity hides the change
+            self._metaCache.pop(metadataPath, None)
+    
+    def _metadataLock(self, metadataPath: Path) -> threading.Lock:
+        with self._metaLocksGuard:
+            return self._metaLocks.setdefault(metadataPath, threading.Lock())
+
+    def _compactMetadata(self, metadataPath: Path):
+        """Rewrite metadataPath with its log replayed, then drop the log (caller holds _metadataLock)"""
+        metadata = _readMetadataJson(metadataPath)
+        # Unique temporary file next to the target, so os.replace stays atomic
+        fd, tmpName = tempfile.mkstemp(dir=metadataPath.parent, prefix=f"{metadataPath.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_dumpJson(metadata.to_dict(), indent=True))
+            # mkstemp creates the file private to the user: keep the permissions of the file it replaces
             if metadataPath.exists():
-                with open(metadataPath, 'r') as f:
-                    existing_metadata = json.load(f)
+                shutil.copymode(metadataPath, tmpName)
             else:
-                existing_metadata = {}
-
-            # Update metadata
-            existing_metadata[uniqueKey] = metadata
+                os.chmod(tmpName, 0o644)
+            os.replace(tmpName, metadataPath)
+        except BaseException:
+            try:
+                os.remove(tmpName)
+            except FileNotFoundError:
+                pass
+            raise
+        # Replaying the log again is harmless (last record wins), so removing it last is crash-safe
+        try:
+            os.remove(metadataPath.with_suffix('.jsonl'))
+        except FileNotFoundError:
+            pass
 
-            # Save updated metadata
-            metadataPath.parent.mkdir(parents=True, exist_ok=True)
-            with open(metadataPath, 'w') as f:
-                json.dump(existing_metadata, f, indent=2)
-    
     def getMetadata(self, segPath: Path) -> Dict:
         """Get metadata for a specific segmentation."""
         segPath = Path(segPath)
-        print(f"Seg path: {segPath}")
-        self.model_metadata = self._load_model_metadata()
-        self.expert_metadata = self._load_expert_metadata()
-        self.expert_VAL_metadata = self._load_expert_metadata(VAL=True)
+        logger.debug("Seg path: %s", segPath)
+        # Cheap: only re-lists the metadata files, unchanged ones are served from _metaCache
+        self.reload_metadata()
         
         # Search for metadata entry
         entry_info = self._find_complete_metadata_entry(segPath)
-        print(f"Entry info: {entry_info}")
+        logger.debug("Entry info: %s", entry_info)
         
         if not entry_info:
             return {}
         
-        return entry_info 
+        # A fresh dict: callers may modify it without touching the cached entry
+        return entry_info.to_dict()
         
     def _generateFileHash(self, node, timestamp: str = None) -> str:
-        """Generate hash for the segmentation node"""
-        if not timestamp:
-            timestamp = str(datetime.datetime.now())
-        else:
-            timestamp = str(timestamp) 
-        return hashlib.md5((timestamp).encode()).hexdigest()[:12]
+        """Generate a 12 hex digit token identifying a save (session salt + counter).
+
+        Only uniqueness is needed, so no digest is computed; node and timestamp are
+        kept for the existing call signature.
+        """
+        return f"{_sessionSalt}{next(_saveCounter) & 0xffff:04x}"
+
+    def _datasetPath(self, path: str) -> str:
+        """Map a stored path (possibly from another machine) into the current dataset.
+
+        Same result as base_path / get_relative_from_data(path), but paths that already
+        contain /data/ are mapped with string operations instead of resolving them.
+        """
+        base = str(self.base_path)
+        if path.startswith(base + '/'):
+            return path
+        split_path = path.split("/data/", 1)
+        if len(split_path) > 1:
+            return os.path.join(base, split_path[1])
+        return str(self.base_path / get_relative_from_data(path))
 
     def track_history(self, seg_path: str) -> List[Dict]:
         """Track the history of a specific segmentation."""
         history = []
         
-        current_path = Path(seg_path)
+        current_str = str(seg_path)
         
-        print(f"Current path: {current_path}")
+        logger.debug("Current path: %s", current_str)
 
-        if not current_path.exists():
-            print(f"Error: File does not exist: {current_path}")
+        if not os.path.exists(current_str):
+            logger.warning("File does not exist: %s", current_str)
             return []
         
         # Track history recursively
         visited_paths = set()  # Prevent infinite loops
-        while str(current_path) not in visited_paths:
-            print(f"Current path HISTORY: {current_path}")
-            visited_paths.add(str(current_path))
+        while current_str not in visited_paths:
+            logger.debug("Current path HISTORY: %s", current_str)
+            visited_paths.add(current_str)
             
-            entry_info = self._find_metadata_entry(current_path)
+            entry_info = self._find_metadata_entry(Path(current_str))
             if not entry_info:
-                print(f"Error: Metadata not found for {current_path}")
+                logger.warning("Metadata not found for %s", current_str)
                 break
             entry_type, model_name, key, entry = entry_info
             history_entry = {
-                'path': str(current_path),
+                'path': current_str,
                 'type': entry_type,
                 'model': model_name,
                 'owner': entry.get('owner', 'Unknown'),
@@ -1631,52 +2172,47 @@ class VesselVerseLogic(ScriptedLoadableModuleLogic):
             # Check for original segmentation
             orig_path = entry.get('original_segmentation_path')
             if not orig_path:
-                print(f"You reached the end of the history")
+                logger.debug("You reached the end of the history")
                 break
             
-            orig_path = get_relative_from_data(orig_path)
-            orig_path = self.base_path / orig_path
-            current_path = Path(orig_path)
-            print(f"NEW Current path: {current_path}")
-            if not current_path.exists():
-                assert(), f"Error: Original segmentation not found: {current_path}"
+            current_str = self._datasetPath(orig_path)
+            logger.debug("NEW Current path: %s", current_str)
+            if not os.path.exists(current_str):
+                assert(), f"Error: Original segmentation not found: {current_str}"
                 break
-            if str(current_path) in visited_paths:
-                print(f"Error: Infinite loop detected: {current_path}")
+            if current_str in visited_paths:
+                logger.warning("Infinite loop detected: %s", current_str)
                 break
                 
         
         return history
 
     def _find_complete_metadata_entry(self, seg_path: Path) -> Optional[Dict]:
-        flag = False
-        for model_name, model_data in self.expert_metadata.items():
+        # Both string forms are loop-invariant: build them once per search
+        rel_path = str(seg_path.relative_to(self.base_path))
+        abs_path = str(seg_path)
+        # Each store only holds paths under its own directory, so search just that one
+        if 'ExpertAnnotations/' in rel_path or 'ExpertVAL/' in rel_path:
+            metadata = self.expert_metadata if 'ExpertAnnotations/' in rel_path else self.expert_VAL_metadata
+            for model_name, model_data in metadata.items():
+                key = model_data.find(relative_path=rel_path, path=abs_path)
+                if key is not None:
+                    logger.debug("Found expert metadata for %s", seg_path)
+                    return model_data[key]
+            logger.debug("No expert metadata found for %s", seg_path)
+            return None
+
+        logger.debug("Searching in model metadata")
+        model_name = Path(seg_path).parent.parent.stem
+        if model_name in self.model_metadata:
+            model_data = self.model_metadata[model_name]
+            key = model_data.find(relative_path=rel_path)
+            if key is not None:
+                return model_data[key]
+            # Stored relative paths may carry a different prefix
             for key, entry in model_data.items():
-                if entry['relative_path'] == str(seg_path.relative_to(self.base_path)) or entry['path'] == str(seg_path):
-                    print(f"Found expert metadata for {seg_path}")
-                    flag = True
+                if abs_path.endswith(entry.relative_path):
                     return entry
-        if not flag:
-            for model_name, model_data in self.expert_VAL_metadata.items():
-                for key, entry in model_data.items():
-                    if entry['relative_path'] == str(seg_path.relative_to(self.base_path)) or entry['path'] == str(seg_path):
-                        print(f"Found expert metadata for {seg_path}")
-                        flag = True
-                        return entry
-
-        if not flag:
-            print("No expert metadata found: searching in model metadata")
-            # print(f"Seg path: {seg_path}")
-            for model_name, model_data in self.model_metadata.items():
-                if model_name != Path(seg_path).parent.parent.stem:
-                    continue
-                # print(f"Model name: {model_name}")
-                for key, entry in model_data.items():
-                    # print(f"Key: {key}")
-                    # print(f"Entry: {entry}")
-                    if str(seg_path).endswith(entry['relative_path']):
-                        # print(f"Found model metadata for {seg_path}")
-                        return entry
             
     
     def _find_metadata_entry(self, seg_path: Path) -> Optional[tuple]:
@@ -1685,37 +2221,85 @@ class VesselVerseLogic(ScriptedLoadableModuleLogic):
             rel_path = str(seg_path.relative_to(self.base_path))
         except ValueError:
             rel_path = str(seg_path)
+        abs_path = str(seg_path)
         
         # Search in expert metadata (for modifications)
-        if 'ExpertAnnotations/' in rel_path:    
-            for model_name, model_data in self.expert_metadata.items():
-                for key, entry in model_data.items():
-                    if entry['relative_path'] == rel_path or entry['path'] == str(seg_path):
-                        return ('expert', model_name, key, entry)
-        elif 'ExpertVAL/' in rel_path:
-            # Search in VALIDATED expert metadata
-            for model_name, model_data in self.expert_VAL_metadata.items():
-                for key, entry in model_data.items():
-                    if entry['relative_path'] == rel_path or entry['path'] == str(seg_path):
-                        return ('expert', model_name, key, entry)
+        if 'ExpertAnnotations/' in rel_path or 'ExpertVAL/' in rel_path:
+            # ExpertVAL/ holds the VALIDATED expert metadata
+            metadata = self.expert_metadata if 'ExpertAnnotations/' in rel_path else self.expert_VAL_metadata
+            for model_name, model_data in metadata.items():
+                key = model_data.find(relative_path=rel_path, path=abs_path)
+                if key is not None:
+                    return ('expert', model_name, key, model_data[key])
         else:
             # Search in model metadata (for originals)
-            path_name = seg_path.name
             seg_model = seg_path.parent.parent.stem
-            for model_name, model_data in self.model_metadata.items():
-                if model_name in ['IXI_TOT','COW_TOT']:
-                    continue
-                if seg_model != model_name:
-                    continue
-                for key, entry in model_data.items():
-                    if ((entry['relative_path'] == rel_path or 
-                        entry['path'] == str(seg_path) or 
-                        entry['filename'] == path_name)
-                        ):
-                        return ('model', model_name, key, entry)
+            if seg_model in self.model_metadata and seg_model not in ['IXI_TOT','COW_TOT']:
+                model_name = seg_model
+                model_data = self.model_metadata[model_name]
+                key = model_data.find(relative_path=rel_path, path=abs_path, filename=seg_path.name)
+                if key is not None:
+                    return ('model', model_name, key, model_data[key])
                         
             return None
 
+def _readMetadataJson(path: Path) -> IndexedMetadata:
+    """Parse a metadata JSON file and replay its append-only .jsonl log (last record per key wins)"""
+    entries = {}
+    if path.exists():
+        with open(path, 'rb') as f:
+            entries = _loadJson(f.read())
+    logPath = path.with_suffix('.jsonl')
+    if logPath.exists():
+        with open(logPath, 'rb') as f:
+            for line in f:
+                try:
+                    record = _loadJson(line)
+                except json.JSONDecodeError:
+                    continue  # Blank or partially written line
+                entries[record['unique_key']] = record
+    return IndexedMetadata(entries)
+
+def _loadJson(data: bytes):
+    """Parse JSON bytes with orjson when available (raises json.JSONDecodeError either way)"""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def _dumpJson(obj, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes with orjson when available"""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+def _statSignature(path: Path):
+    """(mtime_ns, size) of path, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _readLabelmap(segPath: Path):
+    """Decompress a NIfTI labelmap (runs on a worker thread).
+
+    Returns the voxels in Slicer's KJI order and the IJK-to-RAS matrix.
+    """
+    image = nib.load(str(segPath))
+    array = np.asanyarray(image.dataobj)
+    return np.ascontiguousarray(array.transpose(2, 1, 0)), image.affine
+
+def _writeLabelmap(array, ijkToRAS, segPath: Path):
+    """Compress and write a labelmap given in Slicer's KJI order (runs on a worker thread)"""
+    image = nib.Nifti1Image(np.ascontiguousarray(array.transpose(2, 1, 0)), ijkToRAS)
+    nib.save(image, str(segPath))
+
+def _validNiiGz(path: Path) -> bool:
+    """True if path is an existing regular .nii.gz file (single stat call)"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return stat.S_ISREG(st.st_mode) and path.name.endswith('.nii.gz')
+
 def get_relative_from_data(full_path: str, include_data: bool = False) -> str:
     """
     Extracts the subpath starting from 'data/' in the given absolute path.
@@ -1742,13 +2326,89 @@ class VesselVerseTest(ScriptedLoadableModuleTest):
     def runTest(self):
         self.setUp()
         self.test_VesselVerse1()
+        self.setUp()
+        self.test_CompareThenCompare()
+        self.setUp()
+        self.test_CompareThenEdit()
+        self.test_ResolveAndFixPath()
 
     def test_VesselVerse1(self):
         self.delayDisplay("Starting the test")
         # Add actual tests here
         self.delayDisplay('Test passed')
+
+    def _setUpSegmentationFiles(self):
+        """Logic without a dataset plus two overlapping segmentation files on disk"""
+        tmpDir = Path(tempfile.mkdtemp())
+        logic = VesselVerseLogic()
+        logic.model_metadata_path = logic.expert_metadata_path = logic.expert_metadata_VAL_path = tmpDir
+        
+        segPaths = []
+        for i in range(2):
+            array = np.zeros((8, 8, 8), dtype=np.uint8)
+            array[2:6, 2:6, 1 + i:5 + i] = 1
+            labelmapNode = slicer.util.addVolumeFromArray(array, nodeClassName="vtkMRMLLabelMapVolumeNode")
+            segPath = tmpDir / f"seg{i}.nii.gz"
+            self.assertTrue(slicer.util.saveNode(labelmapNode, str(segPath)))
+            slicer.mrmlScene.RemoveNode(labelmapNode)
+            segPaths.append(segPath)
+        return logic, segPaths
+
+    def _compare(self, logic, firstPath, secondPath):
+        """What both comparison flows do: reload the first segmentation unless it is the node in the scene"""
+        if not logic.isSegmentationLoaded(firstPath):
+            logic.closeAllSegmentations()
+            self.assertTrue(logic.loadSegmentation(firstPath))
+        currentNode = logic.getSegmentationNodes()[0]
+        return currentNode, logic.compareWithCurrent(currentNode, logic.loadSegmentationNode(secondPath))
+
+    def test_CompareThenCompare(self):
+        self.delayDisplay("Compare twice in a row")
+        logic, (firstPath, secondPath) = self._setUpSegmentationFiles()
+        self.assertTrue(logic.loadSegmentation(firstPath))
+        
+        _, firstResult = self._compare(logic, firstPath, secondPath)
+        self.assertEqual(logic.getSegmentationNodes(), [firstResult])
+        
+        # The second comparison must start from the reloaded file, not from the previous diff
+        currentNode, secondResult = self._compare(logic, firstPath, secondPath)
+        self.assertIsNot(currentNode, firstResult)
+        self.assertIsNone(firstResult.GetScene())
+        self.assertEqual(logic.getSegmentationNodes(), [secondResult])
+        self.delayDisplay('Test passed')
+
+    def test_CompareThenEdit(self):
+        self.delayDisplay("Edit after a comparison")
+        logic, (firstPath, secondPath) = self._setUpSegmentationFiles()
+        self.assertTrue(logic.loadSegmentation(firstPath))
+        self.assertTrue(logic.isSegmentationLoaded(firstPath))
         
+        self._compare(logic, firstPath, secondPath)
+        # Only the result node is left: opening the editor must reload the segmentation
+        self.assertFalse(logic.isSegmentationLoaded(firstPath))
+        self.assertIsNone(logic.current_segmentation_path)
         
+        logic.closeAllSegmentations()
+        self.assertTrue(logic.loadSegmentation(firstPath))
+        self.assertTrue(logic.isSegmentationLoaded(firstPath))
+        self.delayDisplay('Test passed')
+
+    def test_ResolveAndFixPath(self):
+        self.delayDisplay("Duplicated directories in resolved paths")
+        reference = '/vesselverse_test/ref.nii.gz'
+        cases = {
+            'data/cases/data/cases/x.nii.gz': '/vesselverse_test/data/cases/x.nii.gz',
+            'a/a/a/b.nii.gz': '/vesselverse_test/a/b.nii.gz',
+            # Names repeated further apart are kept
+            'home/user/foo/bar/user/x.nii.gz': '/vesselverse_test/home/user/foo/bar/user/x.nii.gz',
+            # Only whole directory names are compared
+            'ab/b/x.nii.gz': '/vesselverse_test/ab/b/x.nii.gz',
+        }
+        for relative, expected in cases.items():
+            self.assertEqual(resolve_and_fix_path(relative, reference), Path(expected))
+        self.delayDisplay('Test passed')
+
+
 #######################################################################################
 #######################################################################################
 ###### This code must be the same as the one in  vesselverse/src/core/dataset.py ######
@@ -1759,7 +2419,7 @@ from typing import Dict, List
 
 import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from model_config.model_config import model_registry as registry
+from model_config.model_config import model_registry as registry, dataset_registry
 
 class Dataset:
     def __init__(self, base_path: str):
@@ -1780,12 +2440,17 @@ class Dataset:
             model_name: (self.base_path / model_name).resolve()  # Ensure absolute paths
             for model_name in dataset_config.supported_models if model_name in model_registry.models
         }
+        # Model configs of the supported models, looked up once
+        self._model_cfg_cache = {model_name: model_registry.get_model(model_name) for model_name in self.paths}
 
         # Create directories if they don't exist
         for path in self.paths.values():
-            print(f"LOADING PATH: {path}")
+            logger.debug("LOADING PATH: %s", path)
             path.mkdir(parents=True, exist_ok=True)
 
+        # Image directory key (paths is fixed after __init__)
+        self._tot_key = next((key for key in self.paths if key.endswith('_TOT')), None)
+
     def get_model_path(self, ixi_path: Path, model_name: str) -> Path:
         """Get path for model segmentation file.
         
@@ -1800,14 +2465,15 @@ class Dataset:
             ValueError: If model_name is unknown
             FileNotFoundError: If segmentation file doesn't exist
         """
-        model_config = registry.get_model(model_name)
+        model_config = self._model_cfg_cache.get(model_name) or registry.get_model(model_name)
         if not model_config:
             raise ValueError(f'Unknown model: {model_name}')
             
         
         try:
-            TOT = [path for path in self.paths if path.endswith('_TOT')][0]
-            rel_path = ixi_path.relative_to(self.paths[TOT])
+            if self._tot_key is None:
+                raise ValueError('Dataset has no image directory')
+            rel_path = ixi_path.relative_to(self.paths[self._tot_key])
         except ValueError:
             rel_path = Path(ixi_path.name)
             
@@ -1833,7 +2499,6 @@ def compareSegmentations(current_node, comparison_node, use_padding=False):
     resultNode = slicer.vtkMRMLSegmentationNode()
     slicer.mrmlScene.AddNode(resultNode)
     resultNode.CreateDefaultDisplayNodes()
-    resultNode.CreateClosedSurfaceRepresentation()
 
     colorMap = {
         "Current         :": [0.0, 1.0, 0.0],     # Green
@@ -1866,32 +2531,74 @@ def compareSegmentations(current_node, comparison_node, use_padding=False):
     comparison_labelmap = slicer.util.arrayFromSegmentBinaryLabelmap(
         comparison_node, comparison_node.GetSegmentation().GetNthSegmentID(0), reference_volume)
 
+    # Work on 1-byte masks with preallocated outputs instead of full-size temporaries
+    current_mask = current_labelmap.astype(bool, copy=False)
+    comparison_mask = comparison_labelmap.astype(bool, copy=False)
+
     if use_padding:
-        from scipy.ndimage import binary_dilation
-        padding = 1
-        current_padded = binary_dilation(current_labelmap, iterations=padding)
-        comparison_padded = binary_dilation(comparison_labelmap, iterations=padding)
-        overlap_labelmap = (current_padded & comparison_padded).astype(current_labelmap.dtype)
-        current_only = (current_padded & ~overlap_labelmap).astype(current_labelmap.dtype)
-        comparison_only = (comparison_padded & ~overlap_labelmap).astype(comparison_labelmap.dtype)
-    else:
-        overlap_labelmap = (current_labelmap & comparison_labelmap).astype(current_labelmap.dtype)
-        current_only = (current_labelmap & ~overlap_labelmap).astype(current_labelmap.dtype)
-        comparison_only = (comparison_labelmap & ~overlap_labelmap).astype(comparison_labelmap.dtype)
+        current_mask = _dilateMask(current_mask)
+        comparison_mask = _dilateMask(comparison_mask)
+
+    overlap_labelmap = np.empty_like(current_mask)
+    current_only = np.empty_like(current_mask)
+    comparison_only = np.empty_like(current_mask)
+    np.logical_and(current_mask, comparison_mask, out=overlap_labelmap)
+    np.logical_not(overlap_labelmap, out=comparison_only)
+    np.logical_and(current_mask, comparison_only, out=current_only)
+    np.logical_and(comparison_mask, comparison_only, out=comparison_only)
 
     # Update all segments
-    slicer.util.updateSegmentBinaryLabelmapFromArray(
-        current_only, resultNode, segmentIDs["Current         :"], reference_volume)
-    slicer.util.updateSegmentBinaryLabelmapFromArray(
-        comparison_only, resultNode, segmentIDs["Comparison  :"], reference_volume)
-    slicer.util.updateSegmentBinaryLabelmapFromArray(
-        overlap_labelmap, resultNode, segmentIDs["Overlap        :"], reference_volume)
-
-    resultNode.CreateClosedSurfaceRepresentation()
+    _updateSegmentFromMask(current_only, resultNode, segmentIDs["Current         :"], reference_volume)
+    _updateSegmentFromMask(comparison_only, resultNode, segmentIDs["Comparison  :"], reference_volume)
+    _updateSegmentFromMask(overlap_labelmap, resultNode, segmentIDs["Overlap        :"], reference_volume)
+
+    # Closed surfaces are left to the caller (see VesselVerseLogic.createClosedSurfaceWhenVisible)
     displayNode.SetVisibility3D(True)
 
     return resultNode
 
+def _updateSegmentFromMask(mask, segmentationNode, segmentID, referenceVolumeNode):
+    """Replace a segment with a KJI bool mask sampled on the reference volume's grid.
+
+    The mask is copied once into a vtkOrientedImageData and handed to the
+    segmentations logic, instead of slicer.util.updateSegmentBinaryLabelmapFromArray
+    which goes through a temporary labelmap volume node.
+    """
+    if referenceVolumeNode.GetParentTransformNode() or segmentationNode.GetParentTransformNode():
+        # Geometry has to go through the transforms: use the generic path
+        slicer.util.updateSegmentBinaryLabelmapFromArray(
+            mask.view(np.uint8), segmentationNode, segmentID, referenceVolumeNode)
+        return
+    from vtk.util.numpy_support import numpy_to_vtk
+    voxels = np.ascontiguousarray(mask).view(np.uint8)
+    imageData = slicer.vtkOrientedImageData()
+    imageData.SetDimensions(*voxels.shape[::-1])
+    # deep=True: the image data outlives this function and the (temporary) mask
+    imageData.GetPointData().SetScalars(
+        numpy_to_vtk(voxels.ravel(), deep=True, array_type=vtk.VTK_UNSIGNED_CHAR))
+    ijkToRAS = vtk.vtkMatrix4x4()
+    referenceVolumeNode.GetIJKToRASMatrix(ijkToRAS)
+    imageData.SetImageToWorldMatrix(ijkToRAS)
+    slicer.vtkSlicerSegmentationsModuleLogic.SetBinaryLabelmapToSegment(
+        imageData, segmentationNode, segmentID,
+        slicer.vtkSlicerSegmentationsModuleLogic.MODE_REPLACE, imageData.GetExtent())
+
+def _dilateMask(mask):
+    """One-voxel dilation with the 6-connected cross (same result as binary_dilation(mask)).
+
+    The cross is the union of three 1D segments, so it is computed as the OR of
+    three axis-wise maximum_filter1d passes, which scan memory contiguously.
+    """
+    from scipy.ndimage import maximum_filter1d
+    dilated = maximum_filter1d(mask, size=3, axis=0, mode='constant', cval=0)
+    for axis in range(1, mask.ndim):
+        np.logical_or(dilated, maximum_filter1d(mask, size=3, axis=axis, mode='constant', cval=0), out=dilated)
+    return dilated
+
+# A run of one or more directories immediately followed by the same run
+_REPEATED_DIRS = re.compile(r'((?:/[^/]+)+?)\1(?=/|$)')
+
+@functools.lru_cache(maxsize=1024)
 def resolve_and_fix_path(relative_path: str, reference_path: str) -> Path:
     """
     Resolves a relative path using a reference absolute path and 
@@ -1908,18 +2615,12 @@ def resolve_and_fix_path(relative_path: str, reference_path: str) -> Path:
     # Convert to string for manipulation
     corrected_str = str(resolved_path)
 
-    # Dynamically detect and fix duplicate directory structures
-    path_parts = corrected_str.split('/')
-    seen = set()
-    corrected_parts = []
-
-    for part in path_parts:
-        if part in seen:
-            # If a duplicate segment is detected, skip it
-            continue
-        seen.add(part)
-        corrected_parts.append(part)
-
-    corrected_path = Path('/'.join(corrected_parts))
+    # Collapse directly repeated runs of directories (/data/cases/data/cases -> /data/cases);
+    # names that merely occur twice in the path are left alone
+    while True:
+        collapsed = _REPEATED_DIRS.sub(r'\1', corrected_str)
+        if collapsed == corrected_str:
+            break
+        corrected_str = collapsed
 
-    return corrected_path
\ No newline at end of file
+    return Path(corrected_str)
@@ -87,8 +87,19 @@ class SegmentControl(qt.QWidget):
         self.opacityLabel.setText(f"{value}%")
 
 class OpacitySliderWidget(qt.QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, segmentationNodes=None):
+        """segmentationNodes: optional callable returning the scene's segmentation nodes
+        (e.g. a list kept up to date by scene observers); defaults to a scene query."""
         super().__init__(parent)
+        self._segmentationNodes = segmentationNodes or (
+            lambda: slicer.util.getNodesByClass("vtkMRMLSegmentationNode"))
+        
+        # Slider moves are coalesced and applied at most once per frame
+        self._pendingOpacity = {}
+        self._opacityTimer = qt.QTimer()
+        self._opacityTimer.setSingleShot(True)
+        self._opacityTimer.setInterval(16)
+        self._opacityTimer.connect('timeout()', self._applyPendingOpacity)
         layout = qt.QVBoxLayout(self)
         layout.setSpacing(4)
         
@@ -108,34 +119,42 @@ class OpacitySliderWidget(qt.QWidget):
         
     def updateForNode(self, node):
         """Update controls for specific node."""
-        # Clear existing controls
-        for control in self.segmentControls.values():
-            self.controlsLayout.removeWidget(control)
-            control.deleteLater()
-        self.segmentControls.clear()
-        
-        if not node:
-            return
-            
-        # Create controls for each segment
-        for i in range(node.GetSegmentation().GetNumberOfSegments()):
-            segID = node.GetSegmentation().GetNthSegmentID(i)
-            name = node.GetSegmentation().GetSegment(segID).GetName()
+        # Rebuild with painting suspended so the container relayouts/repaints once
+        self.controlsContainer.setUpdatesEnabled(False)
+        try:
+            # Clear existing controls
+            while self.controlsLayout.count():
+                item = self.controlsLayout.takeAt(0)
+                if item.widget():
+                    item.widget().hide()
+                    item.widget().deleteLater()
+            self.segmentControls.clear()
+            self._pendingOpacity.clear()
             
-            control = SegmentControl(segID, name)
-            self.segmentControls[segID] = control
-            self.controlsLayout.addWidget(control)
-            
-            # Connect signals
-            control.checkbox.stateChanged.connect(
-                lambda state, sid=segID: self._updateSegmentVisibility(sid, state))
-            control.slider.valueChanged.connect(
-                lambda value, sid=segID: self._updateSegmentOpacity(sid, value))
+            if not node:
+                return
+                
+            # Create controls for each segment
+            for i in range(node.GetSegmentation().GetNumberOfSegments()):
+                segID = node.GetSegmentation().GetNthSegmentID(i)
+                name = node.GetSegmentation().GetSegment(segID).GetName()
+                
+                control = SegmentControl(segID, name)
+                self.segmentControls[segID] = control
+                self.controlsLayout.addWidget(control)
+                
+                # Connect signals
+                control.checkbox.stateChanged.connect(
+                    lambda state, sid=segID: self._updateSegmentVisibility(sid, state))
+                control.slider.valueChanged.connect(
+                    lambda value, sid=segID: self._queueSegmentOpacity(sid, value))
+        finally:
+            self.controlsContainer.setUpdatesEnabled(True)
+            self.controlsContainer.update()
             
     def _updateSegmentVisibility(self, segmentID, state):
         """Update visibility for segment."""
-        nodes = slicer.util.getNodesByClass("vtkMRMLSegmentationNode")
-        for node in nodes:
+        for node in self._segmentationNodes():
             displayNode = node.GetDisplayNode()
             if displayNode and node.GetSegmentation().GetSegment(segmentID):
                 isVisible = state == qt.Qt.Checked
@@ -144,11 +163,21 @@ class OpacitySliderWidget(qt.QWidget):
                 displayNode.SetSegmentVisibility2DFill(segmentID, isVisible)
                 displayNode.SetSegmentVisibility2DOutline(segmentID, isVisible)
     
+    def _queueSegmentOpacity(self, segmentID, value):
+        """Record the latest slider value; it is applied when the frame timer fires."""
+        self._pendingOpacity[segmentID] = value
+        if not self._opacityTimer.isActive():
+            self._opacityTimer.start()
+    
+    def _applyPendingOpacity(self):
+        pending, self._pendingOpacity = self._pendingOpacity, {}
+        for segmentID, value in pending.items():
+            self._updateSegmentOpacity(segmentID, value)
+    
     def _updateSegmentOpacity(self, segmentID, value):
         """Update opacity for segment."""
         opacity = value / 100.0
-        nodes = slicer.util.getNodesByClass("vtkMRMLSegmentationNode")
-        for node in nodes:
+        for node in self._segmentationNodes():
             displayNode = node.GetDisplayNode()
             if displayNode and node.GetSegmentation().GetSegment(segmentID):
                 displayNode.SetSegmentOpacity3D(segmentID, opacity)
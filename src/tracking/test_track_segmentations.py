@@ -0,0 +1,112 @@
+import json, os, sys, shutil, tempfile, unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+from track_segmentations import SegmentationTracker
+
+IXI_TOT_SEG = "IXI_TOT/IXI001-Guys-0828-MRA.nii.gz"
+STAPLE_SEG = "STAPLE/IXI001-Guys-0828-MRA_staple.nii.gz"
+EXPERT_SEG = "ExpertAnnotations/STAPLE/IXI001-Guys-0828-MRA_expert.nii.gz"
+CYCLE_A_SEG = "COW_TOT/IXI010-HH-1111-MRA.nii.gz"
+CYCLE_B_SEG = "COW_TOT/IXI011-HH-2222-MRA.nii.gz"
+A2V_PRED = "A2V/preds/IXI002-HH-1234_pred.nii.gz"
+
+def _entry(relative_path, original=None, owner="tester"):
+    return {
+        "relative_path": relative_path,
+        "path": relative_path,
+        "filename": os.path.basename(relative_path),
+        "owner": owner,
+        "creation_date": "2024-01-01",
+        "notes": "",
+        "original_segmentation_path": original,
+    }
+
+class TestSegmentationTracker(unittest.TestCase):
+    """Lookups, listing and history on a small data tree"""
+
+    def setUp(self):
+        self.base_path = Path(tempfile.mkdtemp()).resolve()
+        self.addCleanup(shutil.rmtree, self.base_path)
+        for rel in (IXI_TOT_SEG, STAPLE_SEG, EXPERT_SEG, CYCLE_A_SEG, CYCLE_B_SEG, A2V_PRED):
+            (self.base_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (self.base_path / rel).touch()
+
+        self._write("model_metadata/IXI_TOT_metadata.json", {"ixi001": _entry(IXI_TOT_SEG)})
+        self._write("model_metadata/COW_TOT_metadata.json", {
+            "ixi010": _entry(CYCLE_A_SEG, original=CYCLE_B_SEG),
+            "ixi011": _entry(CYCLE_B_SEG, original=CYCLE_A_SEG),
+        })
+        self._write("model_metadata/STAPLE_metadata.json", {"ixi001": _entry(STAPLE_SEG, original=IXI_TOT_SEG)})
+        # Later in the registry than STAPLE and nnUNet: loses every tie
+        self._write("model_metadata/A2V_metadata.json", {
+            "ixi001": _entry(STAPLE_SEG, owner="a2v"),
+            "ixi002": _entry("A2V/IXI002-HH-1234-MRA.nii.gz"),
+        })
+        self._write("model_metadata/nnUNet_metadata.json", {"ixi001": _entry(EXPERT_SEG, owner="nnunet")})
+        self._write("metadata/STAPLE_expert_metadata.json", {
+            "ixi001_expert": _entry(EXPERT_SEG, original=STAPLE_SEG, owner="expert"),
+        })
+
+        with redirect_stdout(StringIO()):
+            self.tracker = SegmentationTracker(base_path=str(self.base_path))
+
+    def _write(self, rel, data):
+        path = self.base_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data))
+
+    def test_find_metadata_entry_loads_models_lazily(self):
+        entry = self.tracker._find_metadata_entry(self.base_path / IXI_TOT_SEG)
+        self.assertEqual((entry.kind, entry.model), ("model", "IXI_TOT"))
+        # The first model in the registry holds the hit: no other model is loaded
+        self.assertEqual(list(self.tracker._model_metadata_cache), ["IXI_TOT"])
+
+    def test_find_metadata_entry_ranking(self):
+        entry = self.tracker._find_metadata_entry(self.base_path / STAPLE_SEG)
+        self.assertEqual((entry.model, entry.owner), ("STAPLE", "tester"))
+        self.assertNotIn("A2V", self.tracker._model_metadata_cache)
+
+        # Expert metadata precedes every model
+        entry = self.tracker._find_metadata_entry(self.base_path / EXPERT_SEG)
+        self.assertEqual((entry.kind, entry.model, entry.owner), ("expert", "STAPLE", "expert"))
+
+        self.assertIsNone(self.tracker._find_metadata_entry(self.base_path / "unknown.nii.gz"))
+
+    def test_list_all_segmentations(self):
+        segmentations = self.tracker.list_all_segmentations()
+        expected = sorted([
+            (str(self.base_path / IXI_TOT_SEG), "IXI_TOT"),
+            (str(self.base_path / CYCLE_A_SEG), "COW_TOT"),
+            (str(self.base_path / CYCLE_B_SEG), "COW_TOT"),
+            (str(self.base_path / STAPLE_SEG), "STAPLE"),
+            (str(self.base_path / STAPLE_SEG), "A2V"),
+            (str(self.base_path / EXPERT_SEG), "nnUNet"),
+            (str(self.base_path / EXPERT_SEG), "ExpertAnnotations"),
+        ])
+        self.assertEqual(segmentations, [(i, path, model) for i, (path, model) in enumerate(expected, 1)])
+        self.assertEqual(self.tracker.path_mapping, [path for path, _ in expected])
+
+    def test_track_history(self):
+        history = self.tracker.track_history(str(self.base_path / EXPERT_SEG))
+        self.assertEqual([(entry["type"], entry["model"]) for entry in history],
+                         [("expert", "STAPLE"), ("model", "STAPLE"), ("model", "IXI_TOT")])
+        self.assertEqual(history[-1]["path"], str(self.base_path / IXI_TOT_SEG))
+
+    def test_track_history_stops_on_cycle(self):
+        history = self.tracker.track_history(str(self.base_path / CYCLE_A_SEG))
+        self.assertEqual([entry["path"] for entry in history],
+                         [str(self.base_path / CYCLE_A_SEG), str(self.base_path / CYCLE_B_SEG)])
+
+    def test_track_history_infers_model_from_path(self):
+        # No metadata entry for the file: the model is inferred from the path and
+        # the entry from a filename fragment ("IXI002") it contains
+        history = self.tracker.track_history(str(self.base_path / A2V_PRED))
+        self.assertEqual(len(history), 1)
+        self.assertEqual((history[0]["type"], history[0]["model"]), ("model", "A2V"))
+        self.assertEqual(history[0]["path"], str(self.base_path / A2V_PRED))
+
+if __name__ == "__main__":
+    unittest.main()
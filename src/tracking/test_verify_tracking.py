@@ -0,0 +1,43 @@
+import os, sys, shutil, tempfile, unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+from verify_tracking import TrackingVerifier
+
+class TestVerifyTrackingSymlinks(unittest.TestCase):
+    """Directory symlinks are not followed by the scan, as with Path.rglob"""
+
+    def setUp(self):
+        self.base_path = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.base_path)
+        a2v = self.base_path / "A2V"
+        (a2v / "sub").mkdir(parents=True)
+        (a2v / "IXI001_pred.nii.gz").touch()
+        (a2v / "sub" / "IXI002_pred.nii.gz").touch()
+        other = self.base_path / "other"
+        other.mkdir()
+        (other / "IXI003_pred.nii.gz").touch()
+        try:
+            os.symlink(os.path.join("..", "other"), a2v / "linked")
+            os.symlink(os.path.join("..", "A2V"), a2v / "loop")  # Cycle
+        except (OSError, NotImplementedError):
+            self.skipTest("symlinks are not supported here")
+
+    def test_verify_all_with_symlinks(self):
+        verifier = TrackingVerifier(base_path=str(self.base_path))
+        with redirect_stdout(StringIO()):
+            results = verifier.verify_all()
+
+        stats = results["directory_stats"]["A2V"]
+        self.assertTrue(stats["exists"])
+        self.assertEqual(stats["file_count"], 2)
+        self.assertEqual(stats["example_files"], ["IXI001_pred.nii.gz", "IXI002_pred.nii.gz"])
+
+        case_df = results["case_distribution"]
+        self.assertEqual(sorted(case_df.index), ["IXI001", "IXI002"])
+        self.assertTrue(case_df["A2V"].all())
+
+if __name__ == "__main__":
+    unittest.main()
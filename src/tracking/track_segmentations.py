@@ -1,56 +1,213 @@
 #!/usr/bin/env python3
-import sys, json, argparse
+import os, sys, json, argparse
+from collections import namedtuple
+from multiprocessing import Pool
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+try:
+    import orjson
+except ImportError:  # Optional faster parser: fall back to the json module
+    orjson = None
+
+try:
+    import readline
+except ImportError:  # Not available on Windows: interactive mode works without completion
+    readline = None
+
 sys.path.append(str(Path(__file__).parent.parent))
-from model_config.model_config import registry
+from model_config.model_config import model_registry as registry
+
+# Below this many model metadata files, a process pool costs more than it saves
+_POOL_MIN_FILES = 4
+
+# The fields of a metadata entry the tracker uses; the raw JSON dicts are not kept.
+# owner/creation_date/notes hold the display defaults when missing from the JSON.
+Entry = namedtuple('Entry', 'kind model key relative_path path filename owner creation_date notes '
+                            'original_segmentation_path')
+
+_RULE = "=" * 80
+_LIST_HEADER = f"[{'ID':>3}] {'Model':20} | {'File name':50} | {'Path'}"
 
 class SegmentationTracker:
     def __init__(self, base_path: str = "data"):
         self.base_path = Path(base_path).resolve()
         self.model_metadata_path = self.base_path / "model_metadata"
         self.expert_metadata_path = self.base_path / "metadata"
-        self.model_metadata = self._load_model_metadata()
+        # Model metadata is loaded per model on first use (see _get_model_metadata)
+        self._model_metadata_cache: Dict[str, Dict[str, Entry]] = {}
+        # Registry snapshot, iterated in the lookup and inference loops
+        self._model_configs = tuple(registry.models.values())
+        self._model_names_lower = tuple(model_config.name.lower() for model_config in self._model_configs)
+        self._model_ranks = {model_config.name: rank for rank, model_config in enumerate(self._model_configs, 1)}
+        self._expert_files: Dict[str, Path] = {}  # expert model -> metadata file, for full dumps
         self.expert_metadata = self._load_expert_metadata()
-        self.path_mapping = {}
+        self.path_mapping: List[str] = []  # ID - 1 -> path
+        # Canonical path string -> small integer ID (for cycle detection)
+        self._path_to_id: Dict[str, int] = {}
+        # Memoized path conversions (the tracker is short-lived, no invalidation needed)
+        self._norm_cache: Dict[str, Path] = {}
+        self._rel_cache: Dict[str, str] = {}
+        self._base_resolved_str = str(self.base_path)  # Already resolved above
+        # directory -> {entry name: is symlink}, from one scandir per directory
+        self._dir_names_cache: Dict[str, Dict[str, bool]] = {}
+        # directory as written in the metadata -> canonical directory (symlinks resolved)
+        self._real_dirs: Dict[str, str] = {}
+        # model name -> filename fragment matcher for path-based inference
+        self._fragment_matchers: Dict[str, tuple] = {}
+        self._build_indexes()
 
-    def _load_model_metadata(self) -> Dict:
-        metadata = {}
-        for model_config in registry.models.values():
-            json_file = self.model_metadata_path / f"{model_config.name}_metadata.json"
+    def _get_model_metadata(self, model_name: str) -> Dict[str, Entry]:
+        """Entries of a registered model, loaded and indexed on first access"""
+        entries = self._model_metadata_cache.get(model_name)
+        if entries is None:
+            json_file = self.model_metadata_path / f"{model_name}_metadata.json"
+            metadata = _parse_one((model_name, json_file))[1] if json_file.exists() else {}
+            entries = self._add_model_metadata(model_name, metadata)
+        return entries
+
+    def _add_model_metadata(self, model_name: str, metadata: Dict) -> Dict[str, Entry]:
+        entries = _slim_entries('model', model_name, metadata)
+        self._model_metadata_cache[model_name] = entries
+        self._index_entries(self._model_ranks[model_name], entries.values())
+        return entries
+
+    def _load_all_model_metadata(self):
+        """Load every model not loaded yet, parsing in worker processes when there are many files"""
+        pairs = []
+        for model_config in self._model_configs:
+            model_name = model_config.name
+            if model_name in self._model_metadata_cache:
+                continue
+            json_file = self.model_metadata_path / f"{model_name}_metadata.json"
             if json_file.exists():
-                with open(json_file) as f:
-                    metadata[model_config.name] = json.load(f)
-        return metadata
+                pairs.append((model_name, json_file))
+            else:
+                self._add_model_metadata(model_name, {})
+        if len(pairs) >= _POOL_MIN_FILES:
+            with Pool(min(8, os.cpu_count() or 1)) as pool:
+                results = pool.map(_parse_one, pairs)
+        else:
+            results = map(_parse_one, pairs)
+        for model_name, metadata in results:
+            self._add_model_metadata(model_name, metadata)
 
     def _load_expert_metadata(self) -> Dict:
         metadata = {}
-        for json_file in self.expert_metadata_path.glob("*_expert_metadata.json"):
-            with open(json_file) as f:
-                metadata[json_file.stem.split('_')[0]] = json.load(f)
+        json_files = {json_file.with_suffix('.json')
+                      for json_file in self.expert_metadata_path.glob("*_expert_metadata.json*")
+                      if json_file.suffix in ('.json', '.jsonl')}
+        for json_file in sorted(json_files):
+            model_name = json_file.stem.split('_')[0]
+            metadata[model_name] = _slim_entries('expert', model_name, self._read_expert_metadata(json_file))
+            self._expert_files[model_name] = json_file
         return metadata
 
+    @staticmethod
+    def _read_expert_metadata(json_file: Path) -> Dict:
+        """Read an expert metadata file and replay its append-only .jsonl log (last record wins)"""
+        entries = {}
+        if json_file.exists():
+            with open(json_file, 'rb') as f:
+                entries = _load_json(f.read())
+        log_file = json_file.with_suffix('.jsonl')
+        if log_file.exists():
+            with open(log_file, 'rb') as f:
+                for line in f:
+                    try:
+                        record = _load_json(line)
+                    except json.JSONDecodeError:
+                        continue
+                    entries[record['unique_key']] = record
+        return entries
+
+    def _build_indexes(self):
+        """Index the expert entries; model entries are added as each model is loaded"""
+        self._by_relpath, self._by_path, self._by_filename = {}, {}, {}
+        self._index_entries(0, (entry for model_data in self.expert_metadata.values()
+                                for entry in model_data.values()))
+
+    def _index_entries(self, rank: int, entries):
+        """Index entries by relative_path, path and (models only) filename.
+
+        Values are ((rank, n), entry), where rank is 0 for expert metadata and the
+        registry position for models, so the lowest order among several hits is
+        the entry the former linear scan would have returned.
+        """
+        for n, entry in enumerate(entries):
+            info = ((rank, n), entry)
+            self._by_relpath.setdefault(entry.relative_path, info)
+            self._by_path.setdefault(entry.path, info)
+            if entry.kind == 'model':
+                self._by_filename.setdefault(entry.filename, info)
+
     def _normalize_path(self, path: Path) -> Path:
-        try:
-            return path.resolve() if path.is_absolute() else (self.base_path / path).resolve()
-        except Exception:
-            return path
+        key = str(path)
+        normalized = self._norm_cache.get(key)
+        if normalized is None:
+            try:
+                normalized = path.resolve() if path.is_absolute() else (self.base_path / path).resolve()
+            except Exception:
+                normalized = path
+            self._norm_cache[key] = normalized
+        return normalized
+
+    def _fast_normalize(self, rel: str) -> str:
+        """String-only equivalent of _normalize_path for metadata paths.
+
+        The parent directory is canonicalized with os.path.realpath once per
+        distinct directory (entries share few directories); the file itself is
+        only resolved when the directory listing says it is a symlink.
+        """
+        directory, name = os.path.split(os.path.join(self._base_resolved_str, rel))
+        real_dir = self._real_dirs.get(directory)
+        if real_dir is None:
+            real_dir = self._real_dirs[directory] = os.path.realpath(directory)
+        path = os.path.join(real_dir, name)
+        if self._dir_entries(real_dir).get(name):
+            return os.path.realpath(path)
+        return path
+
+    def _dir_entries(self, directory: str) -> Dict[str, bool]:
+        """Entries of a directory (name -> is symlink), listed once and reused"""
+        entries = self._dir_names_cache.get(directory)
+        if entries is None:
+            try:
+                with os.scandir(directory) as it:
+                    entries = {entry.name: entry.is_symlink() for entry in it}
+            except OSError:
+                entries = {}
+            self._dir_names_cache[directory] = entries
+        return entries
+
+    def _exists_cached(self, path: str) -> bool:
+        """Existence check answered from the cached listing of the parent directory"""
+        return os.path.basename(path) in self._dir_entries(os.path.dirname(path))
+
+    def _relative_str(self, seg_path: Path) -> str:
+        """str(seg_path) relative to base_path (or unchanged if outside it), memoized"""
+        key = str(seg_path)
+        rel_path = self._rel_cache.get(key)
+        if rel_path is None:
+            try:
+                rel_path = str(seg_path.relative_to(self.base_path))
+            except ValueError:
+                rel_path = key
+            self._rel_cache[key] = rel_path
+        return rel_path
 
     def list_all_segmentations(self) -> List[Tuple[int, str, str]]:
         all_paths = []
         
         # Add paths from registered models
-        for model_name, model_data in self.model_metadata.items():
-            model_config = registry.get_model(model_name)
-            if not model_config:
-                continue
-                
-            for entry in model_data.values():
+        self._load_all_model_metadata()
+        for model_config in self._model_configs:
+            model_name = model_config.name
+            for entry in self._get_model_metadata(model_name).values():
                 try:
-                    path = self._normalize_path(Path(entry['relative_path']))
-                    if path.exists():
-                        all_paths.append((str(path), model_config.name))
+                    path = self._fast_normalize(entry.relative_path)
+                    if self._exists_cached(path):
+                        all_paths.append((path, model_config.name))
                 except Exception as e:
                     print(f"Error processing path for {model_name}: {e}")
 
@@ -58,85 +215,135 @@ class SegmentationTracker:
         for model_name, model_data in self.expert_metadata.items():
             for entry in model_data.values():
                 try:
-                    path = self._normalize_path(Path(entry['relative_path']))
-                    if path.exists():
-                        all_paths.append((str(path), "ExpertAnnotations"))
+                    path = self._fast_normalize(entry.relative_path)
+                    if self._exists_cached(path):
+                        all_paths.append((path, "ExpertAnnotations"))
                 except Exception as e:
                     print(f"Error processing expert path: {e}")
 
-        unique_paths = sorted(set(all_paths))
+        # Order-preserving dedup, then an in-place sort; the (path, model) order
+        # (model breaks ties) keeps the IDs the same as before
+        unique_paths = list(dict.fromkeys(all_paths))
+        unique_paths.sort()
         numbered_paths = [(i+1, path, model) for i, (path, model) in enumerate(unique_paths)]
-        self.path_mapping = {i: path for i, path, _ in numbered_paths}
+        self.path_mapping = [path for _, path, _ in numbered_paths]
         return numbered_paths
 
-    def _find_metadata_entry(self, seg_path: Path) -> Optional[tuple]:
-        try:
-            rel_path = str(seg_path.relative_to(self.base_path))
-        except ValueError:
-            rel_path = str(seg_path)
+    def _find_metadata_entry(self, seg_path: Path) -> Optional[Entry]:
+        lookup = (self._relative_str(seg_path), str(seg_path), seg_path.name)
 
-        # Check expert metadata first
-        for model_name, model_data in self.expert_metadata.items():
-            for key, entry in model_data.items():
-                if entry['relative_path'] == rel_path or entry['path'] == str(seg_path):
-                    return ('expert', model_name, key, entry)
+        # Expert metadata is checked first, then model metadata in registry order
+        # (see _index_entries). Models are loaded in that order until a hit is
+        # found that no model still unloaded could precede.
+        if len(self._model_metadata_cache) < len(self._model_ranks):
+            for rank, model_config in enumerate(self._model_configs, 1):
+                hit = self._lookup(*lookup)
+                if hit and hit[0][0] < rank:
+                    return hit[1]
+                self._get_model_metadata(model_config.name)
+        hit = self._lookup(*lookup)
+        return hit[1] if hit else None
 
-        # Then check model metadata
-        for model_config in registry.models.values():
-            model_data = self.model_metadata.get(model_config.name, {})
-            for key, entry in model_data.items():
-                if (entry['relative_path'] == rel_path or 
-                    entry['path'] == str(seg_path) or
-                    entry['filename'] == seg_path.name):
-                    return ('model', model_config.name, key, entry)
+    def _lookup(self, rel_path: str, path: str, filename: str) -> Optional[tuple]:
+        """Best (order, entry) among the indexed entries matching any of the keys.
 
-        return None
+        The kind is part of the indexed value, so one probe per index suffices.
+        A relative_path hit only loses to an earlier entry matched by path or
+        filename (the former scan matched an entry on any of the three).
+        """
+        best = self._by_relpath.get(rel_path)
+        hit = self._by_path.get(path)
+        if hit is not None and (best is None or hit[0] < best[0]):
+            best = hit
+        hit = self._by_filename.get(filename)
+        if hit is not None and (best is None or hit[0] < best[0]):
+            best = hit
+        return best
 
     def _find_complete_metadata_entry(self, seg_path: Path) -> Optional[Dict]:
-        for model_name, model_data in self.expert_metadata.items():
-            for key, entry in model_data.items():
-                if entry['relative_path'] == str(seg_path.relative_to(self.base_path)) or entry['path'] == str(seg_path):
-                    print(f"Found expert metadata for {seg_path}")
-                    return entry
+        rel_path = str(seg_path.relative_to(self.base_path))
+        best = None
+        for hit in (self._by_relpath.get(rel_path), self._by_path.get(str(seg_path))):
+            if hit is not None and hit[1].kind == 'expert' and (best is None or hit[0] < best[0]):
+                best = hit
+        if best is not None:
+            print(f"Found expert metadata for {seg_path}")
+            # Only the slim entry is kept: re-read the file for the full record (rare path)
+            entry = best[1]
+            return self._read_expert_metadata(self._expert_files[entry.model]).get(entry.key)
                 
+    def _fragment_matcher(self, model_name: str) -> tuple:
+        """(fragment -> index of first entry containing it, fragment lengths, entry keys) for a model"""
+        matcher = self._fragment_matchers.get(model_name)
+        if matcher is None:
+            model_data = self._get_model_metadata(model_name)
+            keys = list(model_data)
+            first = {}
+            for i, key in enumerate(keys):
+                for fragment in model_data[key].filename.split('-'):
+                    first.setdefault(fragment, i)
+            matcher = (first, sorted({len(fragment) for fragment in first}), keys)
+            self._fragment_matchers[model_name] = matcher
+        return matcher
+
+    def _infer_model_entry(self, model_name: str, path_str: str) -> Optional[str]:
+        """Key of the first entry of the model with a filename fragment ('-' separated) in path_str.
+
+        Instead of testing every fragment of every entry against the path, every
+        substring of the path with a length some fragment has is looked up once.
+        """
+        first, lengths, keys = self._fragment_matcher(model_name)
+        best = None
+        for length in lengths:
+            for start in range(len(path_str) - length + 1):
+                i = first.get(path_str[start:start + length])
+                if i is not None and (best is None or i < best):
+                    best = i
+        return keys[best] if best is not None else None
+
+    def _path_id(self, path: Path) -> int:
+        """Small integer ID of a normalized path, assigned on first sight"""
+        return self._path_to_id.setdefault(str(path), len(self._path_to_id))
+
     def track_history(self, seg_path: str) -> List[Dict]:
         history = []
         current_path = self._normalize_path(Path(seg_path))
-        visited_paths = set()
+        current_id = self._path_id(current_path)
+        visited_ids = set()
 
-        while str(current_path) not in visited_paths and current_path.exists():
-            visited_paths.add(str(current_path))
-            entry_info = self._find_metadata_entry(current_path)
+        while current_id not in visited_ids and current_path.exists():
+            visited_ids.add(current_id)
+            entry = self._find_metadata_entry(current_path)
 
-            if not entry_info:
+            if not entry:
                 # Try to infer model from path
-                for model_config in registry.models.values():
-                    if model_config.name.lower() in str(current_path).lower():
-                        model_data = self.model_metadata.get(model_config.name, {})
-                        for key, entry in model_data.items():
-                            if any(part in str(current_path) for part in entry['filename'].split('-')):
-                                entry_info = ('model', model_config.name, key, entry)
-                                break
-                if not entry_info:
+                current_str = str(current_path)
+                current_lower = current_str.lower()
+                for model_config, name_lower in zip(self._model_configs, self._model_names_lower):
+                    if name_lower in current_lower:
+                        key = self._infer_model_entry(model_config.name, current_str)
+                        if key is not None:
+                            entry = self._get_model_metadata(model_config.name)[key]
+                if not entry:
                     break
 
-            entry_type, model_name, key, entry = entry_info
             history_entry = {
                 'path': str(current_path),
-                'type': entry_type,
-                'model': model_name,
-                'owner': entry.get('owner', 'Unknown'),
-                'creation_date': entry.get('creation_date', 'Unknown'),
-                'notes': entry.get('notes', '')
+                'type': entry.kind,
+                'model': entry.model,
+                'owner': entry.owner,
+                'creation_date': entry.creation_date,
+                'notes': entry.notes
             }
             history.append(history_entry)
 
-            orig_path = entry.get('original_segmentation_path')
+            orig_path = entry.original_segmentation_path
             if not orig_path:
                 break
 
             current_path = self._normalize_path(Path(orig_path))
-            if str(current_path) in visited_paths:
+            current_id = self._path_id(current_path)
+            if current_id in visited_ids:
                 break
 
         return history
@@ -147,40 +354,40 @@ class SegmentationTracker:
             print(f"No history found for {seg_path}")
             return
 
-        print("\nSegmentation History:")
-        print("=" * 80)
+        # Collected and written at once rather than one print per line
+        lines = ["\nSegmentation History:", _RULE]
 
         for i, entry in enumerate(history, 1):
-            print(f"\nVersion {len(history) - i + 1}:")
-            print(f"  Path: {entry['path']}")
-            print(f"  Type: {entry['type']}")
-            print(f"  Model: {entry['model']}")
-            print(f"  Owner: {entry['owner']}")
-            print(f"  Created: {entry['creation_date']}")
+            lines.append(f"\nVersion {len(history) - i + 1}:")
+            lines.append(f"  Path: {entry['path']}")
+            lines.append(f"  Type: {entry['type']}")
+            lines.append(f"  Model: {entry['model']}")
+            lines.append(f"  Owner: {entry['owner']}")
+            lines.append(f"  Created: {entry['creation_date']}")
             if entry['notes']:
-                print(f"  Notes: {entry['notes']}")
+                lines.append(f"  Notes: {entry['notes']}")
                 
             if i < len(history):
-                print("\n  ↓ (Modified from...) ↓")
+                lines.append("\n  ↓ (Modified from...) ↓")
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def print_metadata(self, seg_path: str):
         """Print metadata for a segmentation."""
         seg_path = self._normalize_path(Path(seg_path))
-        entry_info = self._find_metadata_entry(seg_path)
+        entry = self._find_metadata_entry(seg_path)
         
-        if not entry_info:
+        if not entry:
             print(f"No metadata found for {seg_path}")
             return
         
-        entry_type, model_name, key, entry = entry_info
         print("\nSegmentation Metadata:")
         print("=" * 80)
         print(f"  Path: {seg_path}")
-        print(f"  Type: {entry_type}")
-        print(f"  Model: {model_name}")
-        print(f"  Owner: {entry.get('owner', 'Unknown')}")
-        print(f"  Created: {entry.get('creation_date', 'Unknown')}")
-        print(f"  Notes: {entry.get('notes', '')}")
+        print(f"  Type: {entry.kind}")
+        print(f"  Model: {entry.model}")
+        print(f"  Owner: {entry.owner}")
+        print(f"  Created: {entry.creation_date}")
+        print(f"  Notes: {entry.notes}")
         
     def print_metadata_complete(self, seg_path: str):
         """Print complete metadata for a segmentation."""
@@ -198,22 +405,71 @@ class SegmentationTracker:
     
     def track_by_id(self, seg_id: int):
         """Track history of a segmentation by its ID."""
-        if seg_id not in self.path_mapping:
+        if not 1 <= seg_id <= len(self.path_mapping):
             print(f"Error: Invalid ID {seg_id} provided: Max ID is {len(self.path_mapping)}")
             return -1
         
-        self.print_history(self.path_mapping[seg_id])
+        self.print_history(self.path_mapping[seg_id - 1])
+
+def _load_json(data: bytes):
+    """Parse JSON bytes with orjson when available (raises json.JSONDecodeError either way)"""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def _parse_one(pair: Tuple[str, Path]) -> Tuple[str, Dict]:
+    """Parse one model metadata file (module-level so worker processes can run it)"""
+    model_name, json_file = pair
+    with open(json_file, 'rb') as f:
+        return model_name, _load_json(f.read())
+
+def _slim_entries(kind: str, model_name: str, metadata: Dict) -> Dict[str, Entry]:
+    """Reduce parsed metadata (key -> JSON dict) to key -> Entry.
+
+    The path strings are interned: they are used as index keys and compared
+    against repeatedly; interned copies compare by identity first and are stored
+    once when entries share a value.
+    """
+    return {
+        key: Entry(kind, model_name, key,
+                   _intern(entry.get('relative_path')), _intern(entry.get('path')), _intern(entry.get('filename')),
+                   entry.get('owner', 'Unknown'), entry.get('creation_date', 'Unknown'), entry.get('notes', ''),
+                   entry.get('original_segmentation_path'))
+        for key, entry in metadata.items()
+    }
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
 
 def print_segmentation_list(segmentations):
     """Print the list of segmentations with IDs."""
-    print("\nAll Segmentations:")
-    print("=" * 80)
+    sys.stdout.write(format_segmentation_list(segmentations))
+
+def format_segmentation_list(segmentations) -> str:
+    """The list of segmentations with IDs, as printed by print_segmentation_list."""
+    lines = ["\nAll Segmentations:", _RULE]
     if not segmentations:
-        print("No segmentations found!")
+        lines.append("No segmentations found!")
     else:
-        print(f"[{'ID':>3}] {'Model':20} | {'File name':50} | {'Path'}")
+        lines.append(_LIST_HEADER)
         for id_num, path, model in segmentations:
-            print(f"[{id_num:3d}] {model:20} | {Path(path).name:50} | | {Path(path).parent}")
+            # Paths are normalized absolute strings, so split() matches Path.parent/.name
+            head, tail = os.path.split(path)
+            lines.append(f"[{id_num:3d}] {model:20} | {tail:50} | | {head}")
+    return "\n".join(lines) + "\n"
+
+def _enable_completion(options: List[str]):
+    """Tab-complete the interactive commands and IDs (when readline is available)"""
+    if readline is None:
+        return
+
+    def complete(text, state):
+        matches = [option for option in options if option.startswith(text)]
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer(complete)
+    if 'libedit' in (readline.__doc__ or ''):  # macOS system Python
+        readline.parse_and_bind('bind ^I rl_complete')
+    else:
+        readline.parse_and_bind('tab: complete')
 
 def main():
     parser = argparse.ArgumentParser(description='Track segmentation history')
@@ -226,10 +482,13 @@ def main():
     args = parser.parse_args()
     
     tracker = SegmentationTracker(base_path=args.base_path)
-    segmentations = tracker.list_all_segmentations()
     
     if args.list or args.interactive:
-        print_segmentation_list(segmentations)
+        # Listing needs every model's metadata; --track alone only loads what it visits
+        segmentations = tracker.list_all_segmentations()
+        # Formatted once: 'l' and invalid IDs re-show the same text
+        list_text = format_segmentation_list(segmentations)
+        sys.stdout.write(list_text)
     
     if args.interactive:
         print("\nCommands:")
@@ -239,6 +498,7 @@ def main():
         print("  - 'm' to show metadata of last tracked segmentation")
         
         id_num = -1
+        _enable_completion(['q', 'l', 'm'] + [str(i) for i in range(1, len(segmentations) + 1)])
         
         while True:
             try:
@@ -247,11 +507,11 @@ def main():
                 if choice == 'q':
                     break
                 elif choice == 'l':
-                    print_segmentation_list(segmentations)
+                    sys.stdout.write(list_text)
                     id_num = -1
                     continue
                 elif choice == 'm':
-                    tracker.print_metadata_complete(tracker.path_mapping[id_num]) if id_num > 0 else print("No segmentation tracked yet")
+                    tracker.print_metadata_complete(tracker.path_mapping[id_num - 1]) if 0 < id_num <= len(tracker.path_mapping) else print("No segmentation tracked yet")
                     continue
                 
                 try:
@@ -259,7 +519,7 @@ def main():
                     error = tracker.track_by_id(id_num)
                     if error == -1:
                         print("Invalid ID. Enter a number from the list.")
-                        print_segmentation_list(segmentations)
+                        sys.stdout.write(list_text)
                 except ValueError:
                     print("Invalid command. Enter a number, 'l' for list, or 'q' to quit")
                     
@@ -1,33 +1,61 @@
-import sys, subprocess
+import os, sys, heapq, subprocess
 import pandas as pd
 
 from pathlib import Path
-from typing import Dict
-from collections import defaultdict
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(str(Path(__file__).parent.parent))
-from model_config.model_config import registry
+from model_config.model_config import model_registry as registry
 
 class TrackingVerifier:
     def __init__(self, base_path: str = "data"):
         self.base_path = Path(base_path)
         # Use model registry instead of hardcoded dirs
-        self.expected_dirs = {model.name for model in registry.models.values()}
+        self._model_configs = tuple(registry.models.values())
+        self.expected_dirs = {model.name for model in self._model_configs}
         self.tracked_dirs = self.expected_dirs - {'IXI_TOT'}
+        self._scan_results = None
+
+    def _scan_model_dir(self, model_name: str) -> Optional[List[str]]:
+        """Paths of all .nii.gz files under the model directory (None if it does not exist)"""
+        root = os.path.join(self.base_path, model_name)
+        if not os.path.isdir(root):
+            return None
+        return list(_iter_nii_gz(root))
+
+    def _scan_all(self) -> Dict[str, Optional[List[str]]]:
+        """Scan every model directory once, in parallel, and reuse the result.
+
+        A directory whose scan fails is reported and treated as missing, so one bad
+        tree does not abort the whole verification.
+        """
+        if self._scan_results is None:
+            model_names = [model.name for model in self._model_configs]
+            scan_results = {}
+            with ThreadPoolExecutor(max_workers=min(16, len(model_names)) or 1) as executor:
+                futures = [(model_name, executor.submit(self._scan_model_dir, model_name))
+                           for model_name in model_names]
+                for model_name, future in futures:
+                    try:
+                        scan_results[model_name] = future.result()
+                    except Exception as e:
+                        print(f"❌ Error scanning {model_name}: {e}")
+                        scan_results[model_name] = None
+            self._scan_results = scan_results
+        return self._scan_results
 
     def get_directory_stats(self) -> Dict:
         stats = {}
-        for model_config in registry.models.values():
-            dir_path = self.base_path / model_config.name
-            if dir_path.exists():
-                files = list(dir_path.rglob("*.nii.gz"))
-                stats[model_config.name] = {
+        for model_name, files in self._scan_all().items():
+            if files is not None:
+                stats[model_name] = {
                     'exists': True,
                     'file_count': len(files),
-                    'example_files': sorted([f.name for f in files])[:5]
+                    'example_files': heapq.nsmallest(5, map(os.path.basename, files))
                 }
             else:
-                stats[model_config.name] = {
+                stats[model_name] = {
                     'exists': False,
                     'file_count': 0,
                     'example_files': []
@@ -35,23 +63,30 @@ class TrackingVerifier:
         return stats
 
     def analyze_case_distribution(self) -> pd.DataFrame:
-        case_dict = defaultdict(lambda: {
-            model.name: False for model in registry.models.values()
-        })
-        
-        for model_config in registry.models.values():
-            dir_path = self.base_path / model_config.name
-            if dir_path.exists():
-                for file_path in dir_path.rglob("*.nii.gz"):
-                    case_id = file_path.stem.split('_')[0]
-                    case_dict[case_id][model_config.name] = True
-        
-        return pd.DataFrame.from_dict(case_dict, orient='index')
+        scan_results = self._scan_all()
+        # Parallel case / model columns (no per-file tuple or per-case row dict),
+        # turned into a case x model presence matrix in one step
+        cases, models = [], []
+        for model_name, files in scan_results.items():
+            if files:
+                # Same as Path(file_path).stem.split('_')[0]
+                cases.extend(os.path.basename(file_path)[:-len('.gz')].partition('_')[0] for file_path in files)
+                models.extend([model_name] * len(files))
+        case_df = pd.crosstab(pd.Series(cases, dtype=object), pd.Series(models, dtype=object)) > 0
+        case_df = case_df.reindex(columns=list(scan_results), fill_value=False)
+        return case_df.rename_axis(index=None, columns=None)
     
     def verify_all(self) -> Dict:
         """Run all verifications and return detailed results."""
         print("🔍 Starting verification process...\n")
         
+        # Start `dvc status` now so it runs while the directories are scanned
+        try:
+            dvc_proc = subprocess.Popen(['dvc', 'status'], stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE, text=True)
+        except OSError as e:
+            dvc_proc, dvc_error = None, e
+        
         # Get directory statistics
         dir_stats = self.get_directory_stats()
         print("📁 Directory Statistics:")
@@ -78,11 +113,16 @@ class TrackingVerifier:
         # Check DVC status
         print("\n🔄 DVC Status:")
         print("-" * 50)
-        try:
-            result = subprocess.run(['dvc', 'status'], capture_output=True, text=True)
-            print(result.stdout if result.stdout else "Data and pipelines are up to date")
-        except subprocess.CalledProcessError as e:
-            print(f"Error checking DVC status: {e}")
+        if dvc_proc is None:
+            print(f"Error checking DVC status: {dvc_error}")
+        else:
+            try:
+                out, _ = dvc_proc.communicate(timeout=60)
+                print(out if out else "Data and pipelines are up to date")
+            except subprocess.TimeoutExpired as e:
+                dvc_proc.kill()
+                dvc_proc.communicate()
+                print(f"Error checking DVC status: {e}")
 
         return {
             "directory_stats": dir_stats,
@@ -106,6 +146,29 @@ class TrackingVerifier:
         for count, freq in presence_stats.items():
             print(f"Cases present in {count} directories: {freq}")
 
+def _iter_nii_gz(root: str):
+    """Yield the paths of all .nii.gz files below root (iterative os.scandir walk).
+
+    Like Path.rglob, symlinked directories are not followed and unreadable
+    directories are skipped.
+    """
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    stack.append(entry.path)
+                elif entry.name.endswith('.nii.gz'):
+                    yield entry.path
+
 if __name__ == "__main__":
     verifier = TrackingVerifier()
     results = verifier.verify_all()